@@ -0,0 +1,234 @@
+from functools import cached_property
+
+import cache
+from first_follow import compute_first, compute_follow, update_first, update_follow
+from glr import construct_glr_table
+from lalr import construct_lalr_table
+from ll_parser import construct_ll_table
+from optimize import remove_useless
+from regular import regular_dfa
+from slr_parser import LR0Automaton, construct_slr_table
+from tables import compile_ll_table, compile_slr_table
+
+class GrammarAnalysis:
+    """Lazily computed analysis results for one grammar.
+
+    Each artifact is computed the first time it is asked for and then
+    reused, so FIRST/FOLLOW, the LR(0) automaton and every table are built
+    at most once. ``stats`` is passed on to the FIRST/FOLLOW computation.
+
+    ``add_production`` and ``remove_production`` edit the grammar and
+    update only the parts of what was already computed that the edit
+    affects; the LR tables are rebuilt from the updated automaton when next
+    asked for.
+    """
+    def __init__(self, grammar, stats=None):
+        self.grammar = grammar
+        self.stats = stats
+
+    @classmethod
+    def from_cache(cls, cache_dir, grammar):
+        """Return an analysis seeded from ``cache_dir``, or None on a miss."""
+        entry = cache.load(cache_dir, grammar)
+        if entry is None:
+            return None
+        analysis = cls(grammar)
+        # Seed the cached properties so they are never recomputed
+        analysis.__dict__.update(
+            first=entry.first,
+            follow=entry.follow,
+            ll_compiled=entry.ll_table,
+            slr_compiled=entry.slr_table,
+            is_ll1=entry.ll_table is not None,
+            is_slr1=entry.slr_table is not None,
+        )
+        return analysis
+
+    def save(self, cache_dir):
+        """Store the analysis in ``cache_dir``, computing whatever is missing."""
+        return cache.store(cache_dir, self.grammar, self.first, self.follow,
+                           self.ll_compiled, self.slr_compiled)
+
+    def add_production(self, nonterminal, alternative):
+        """Add one alternative, as in ``Grammar.add_production``."""
+        self.grammar.add_production(nonterminal, [alternative])
+        self._edited(nonterminal, alternative)
+
+    def remove_production(self, nonterminal, alternative):
+        """Remove one alternative, as in ``Grammar.remove_production``."""
+        self.grammar.remove_production(nonterminal, alternative)
+        self._edited(nonterminal, alternative)
+
+    def _edited(self, nonterminal, alternative):
+        grammar = self.grammar
+        nonterminals = grammar.nonterminals
+        computed = self.__dict__
+        changed = {nonterminal}
+        for name in ('useful_grammar', 'useful_follow', 'slr_report', 'lalr_report', 'll_table',
+                     'slr_table', 'lalr_table', 'is_ll1', 'is_slr1', 'is_lalr1', 'll_compiled',
+                     'slr_compiled', 'lalr_compiled', 'glr_table', 'dfa'):
+            computed.pop(name, None)
+        ll_report = computed.pop('ll_report', None)
+
+        # FIRST of the edited nonterminal and of everything using it
+        first_affected = set()
+        if 'first' in computed:
+            self.first, first_affected = update_first(grammar, self.first, changed)
+
+        # Nonterminals with a production mentioning one whose FIRST changed
+        holders = set()
+        seeds = {s for s in alternative if s in nonterminals} if alternative != 'e' else set()
+        if first_affected:
+            for nt in nonterminals:
+                for production in grammar.productions[nt]:
+                    if production != 'e' and not first_affected.isdisjoint(production):
+                        holders.add(nt)
+                        seeds.update(s for s in production if s in nonterminals)
+
+        follow_affected = set()
+        if 'follow' in computed:
+            self.follow, follow_affected = update_follow(grammar, self.first, self.follow, seeds)
+
+        if ll_report is not None:
+            # Rows read FIRST of their productions and FOLLOW of their
+            # nonterminal, so only those that saw one of them change move
+            table, conflicts = ll_report
+            rows = changed | holders | follow_affected
+            new_conflicts = []
+            table = {**table, **construct_ll_table(grammar, self.first, self.follow,
+                                                   new_conflicts, rows)}
+            conflicts = [c for c in conflicts if c.nonterminal not in rows] + new_conflicts
+            computed['ll_report'] = (table, conflicts)
+
+        if 'lr0' in computed:
+            self.lr0.update(grammar, changed, self.useful_grammar)
+
+    @cached_property
+    def first(self):
+        return compute_first(self.grammar, stats=self.stats)
+
+    @cached_property
+    def follow(self):
+        return compute_follow(self.grammar, self.first, stats=self.stats)
+
+    @cached_property
+    def useful_grammar(self):
+        """The grammar without the productions that take part in no
+        derivation of a sentence, which the LR automaton and tables leave
+        out; the grammar itself when there are none."""
+        return remove_useless(self.grammar)
+
+    @cached_property
+    def useful_follow(self):
+        """FOLLOW sets of ``useful_grammar``, which the SLR(1) table reduces
+        on; ``follow`` itself when no production is useless."""
+        useful = self.useful_grammar
+        if useful is self.grammar:
+            return self.follow
+        return compute_follow(useful, compute_first(useful))
+
+    @cached_property
+    def lr0(self):
+        """The grammar's ``LR0Automaton``."""
+        return LR0Automaton(self.grammar, self.useful_grammar)
+
+    @cached_property
+    def ll_report(self):
+        """The LL(1) table, completed despite conflicts, and its conflicts."""
+        conflicts = []
+        table = construct_ll_table(self.grammar, self.first, self.follow, conflicts)
+        return table, conflicts
+
+    @cached_property
+    def slr_report(self):
+        """The SLR(1) ``(action, goto)`` tables, completed despite conflicts,
+        and their conflicts."""
+        conflicts = []
+        tables = construct_slr_table(self.grammar, self.first, self.useful_follow, self.lr0,
+                                     conflicts)
+        return tables, conflicts
+
+    @cached_property
+    def lalr_report(self):
+        """The LALR(1) ``(action, goto)`` tables, completed despite
+        conflicts, and their conflicts."""
+        conflicts = []
+        tables = construct_lalr_table(self.grammar, self.lr0, conflicts)
+        return tables, conflicts
+
+    @cached_property
+    def ll_table(self):
+        """The LL(1) table, or None if the grammar is not LL(1)."""
+        table, conflicts = self.ll_report
+        return None if conflicts else table
+
+    @cached_property
+    def slr_table(self):
+        """The SLR(1) ``(action, goto)`` tables, or ``(None, None)`` if the
+        grammar is not SLR(1)."""
+        tables, conflicts = self.slr_report
+        return (None, None) if conflicts else tables
+
+    @cached_property
+    def lalr_table(self):
+        """The LALR(1) ``(action, goto)`` tables, or ``(None, None)`` if the
+        grammar is not LALR(1)."""
+        tables, conflicts = self.lalr_report
+        return (None, None) if conflicts else tables
+
+    @cached_property
+    def dfa(self):
+        """The minimal DFA of the grammar, or None if it is not recognized
+        as regular."""
+        return regular_dfa(self.grammar)
+
+    @cached_property
+    def glr_table(self):
+        """The GLR ``(action, goto)`` tables: the LALR(1) tables with every
+        conflicting action kept."""
+        return construct_glr_table(*self.lalr_report)
+
+    @property
+    def ll_conflicts(self):
+        return self.ll_report[1]
+
+    @property
+    def slr_conflicts(self):
+        return self.slr_report[1]
+
+    @property
+    def lalr_conflicts(self):
+        return self.lalr_report[1]
+
+    @cached_property
+    def is_ll1(self):
+        return self.ll_table is not None
+
+    @cached_property
+    def is_slr1(self):
+        return self.slr_table[0] is not None
+
+    @cached_property
+    def is_lalr1(self):
+        return self.lalr_table[0] is not None
+
+    @cached_property
+    def ll_compiled(self):
+        """The compiled LL(1) table, or None if the grammar is not LL(1)."""
+        return compile_ll_table(self.grammar, self.ll_table) if self.is_ll1 else None
+
+    @cached_property
+    def slr_compiled(self):
+        """The compiled SLR(1) tables, or None if the grammar is not SLR(1)."""
+        if not self.is_slr1:
+            return None
+        action, goto = self.slr_table
+        return compile_slr_table(self.grammar, action, goto)
+
+    @cached_property
+    def lalr_compiled(self):
+        """The compiled LALR(1) tables, or None if the grammar is not LALR(1)."""
+        if not self.is_lalr1:
+            return None
+        action, goto = self.lalr_table
+        return compile_slr_table(self.grammar, action, goto)
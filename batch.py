@@ -0,0 +1,95 @@
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from ll_parser import ll_parse_compiled
+from slr_parser import slr_parse_compiled
+from tables import CompiledLLTable
+
+# Set once per worker process by _init_worker
+_table = None
+_parse = None
+
+# Tables kept by parse_cached in this process, least recently used first
+_cached_tables = OrderedDict()
+CACHED_TABLES = 16
+
+def _parser_for(table):
+    return ll_parse_compiled if isinstance(table, CompiledLLTable) else slr_parse_compiled
+
+def _init_worker(table):
+    global _table, _parse
+    _table = table
+    _parse = _parser_for(table)
+
+def _parse_chunk(chunk):
+    table = _table
+    parse = _parse
+    return [parse(table, input_string) for input_string in chunk]
+
+def parse_chunk(table, chunk):
+    """Parse a list of strings with a compiled table, in whatever process
+    this is called in."""
+    parse = _parser_for(table)
+    return [parse(table, input_string) for input_string in chunk]
+
+def parse_cached(key, chunk, table=None):
+    """Parse a list of strings with the table this process keeps under
+    ``key``, keeping ``table`` there first if it is given.
+
+    Returns None when no table is given and none is kept under ``key``, so
+    that a caller that sends chunks to a pool can send the table only to
+    the workers that miss it.
+    """
+    if table is not None:
+        _cached_tables[key] = table
+        if len(_cached_tables) > CACHED_TABLES:
+            _cached_tables.popitem(last=False)
+    else:
+        table = _cached_tables.get(key)
+        if table is None:
+            return None
+    _cached_tables.move_to_end(key)
+    return parse_chunk(table, chunk)
+
+def _chunks(inputs, size):
+    inputs = iter(inputs)
+    while True:
+        chunk = list(islice(inputs, size))
+        if not chunk:
+            return
+        yield chunk
+
+def parse_many(table, inputs, workers=None, chunksize=1024):
+    """Parse every string of ``inputs`` with a compiled LL(1) or SLR(1)
+    table, yielding the results in input order.
+
+    With more than one worker the table is sent to each worker process once,
+    when it starts, and the inputs are sent in chunks of ``chunksize``. Only
+    a few chunks per worker are in flight at a time, so ``inputs`` can be an
+    arbitrarily long iterator.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        parse = _parser_for(table)
+        for input_string in inputs:
+            yield parse(table, input_string)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(table,)) as pool:
+        pending = deque()
+        for chunk in _chunks(inputs, chunksize):
+            pending.append(pool.submit(_parse_chunk, chunk))
+            if len(pending) >= 4 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def read_inputs(lines):
+    """Yield the input strings of a file or other line iterator, one per line."""
+    for line in lines:
+        yield line.strip()
@@ -0,0 +1,295 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from first_follow import compute_first, compute_follow
+from grammar import Grammar
+from ll_parser import construct_ll_table, ll_parse_compiled
+from slr_parser import LR0Automaton, construct_slr_table, slr_parse_compiled
+from tables import compile_ll_table, compile_slr_table
+
+# Generated grammars use multi-character symbols, so every production is a
+# tuple and every input is a list of terminals
+
+def expression_chain(levels):
+    """Left-recursive expression grammar with ``levels`` precedence levels,
+    ``E0 -> E0 op0 E1 | E1`` down to ``E<levels> -> ( E0 ) | id``.
+    SLR(1) but not LL(1)."""
+    grammar = Grammar()
+    grammar.start_symbol = 'E0'
+    for i in range(levels):
+        grammar.add_production(f'E{i}', [(f'E{i}', f'op{i}', f'E{i + 1}'), (f'E{i + 1}',)])
+    grammar.add_production(f'E{levels}', [('(', 'E0', ')'), ('id',)])
+    return grammar
+
+def deep_nesting(depth):
+    """Nested brackets with ``depth`` distinct kinds, each level either
+    wrapping the next in its own brackets or ending in ``x``. LL(1) and
+    SLR(1)."""
+    grammar = Grammar()
+    grammar.start_symbol = 'N0'
+    for i in range(depth):
+        grammar.add_production(f'N{i}', [(f'l{i}', f'N{i + 1}', f'r{i}'), ('x',)])
+    grammar.add_production(f'N{depth}', [(f'l{depth}', 'N0', f'r{depth}'), ('x',)])
+    return grammar
+
+def epsilon_heavy(width):
+    """``S -> A0 A1 ... A<width-1> z`` where every ``Ai`` is optional, so
+    FIRST and FOLLOW depend on long nullable chains. LL(1) and SLR(1)."""
+    grammar = Grammar()
+    grammar.start_symbol = 'S'
+    grammar.add_production('S', [tuple(f'A{i}' for i in range(width)) + ('z',)])
+    for i in range(width):
+        grammar.add_production(f'A{i}', [(f'a{i}', f'A{i}'), 'e'])
+    return grammar
+
+def wide_alternation(width):
+    """A list of items, each one of ``width`` alternatives
+    ``t<i> B<i>``. LL(1) and SLR(1)."""
+    grammar = Grammar()
+    grammar.start_symbol = 'S'
+    grammar.add_production('S', [('I', 'L')])
+    grammar.add_production('L', [('I', 'L'), 'e'])
+    grammar.add_production('I', [(f't{i}', f'B{i}') for i in range(width)])
+    for i in range(width):
+        grammar.add_production(f'B{i}', [(f'b{i}',), ('c', f'B{i}')])
+    return grammar
+
+GENERATORS = {
+    'expression_chain': expression_chain,
+    'deep_nesting': deep_nesting,
+    'epsilon_heavy': epsilon_heavy,
+    'wide_alternation': wide_alternation,
+}
+
+def _body(production):
+    return () if production == 'e' else production
+
+def _min_heights(grammar):
+    """Height of the shallowest derivation tree of each nonterminal."""
+    heights = {}
+    changed = True
+    while changed:
+        changed = False
+        for nt, productions in grammar.productions.items():
+            for production in productions:
+                children = [heights.get(s, float('inf')) if s in grammar.nonterminals else 0
+                            for s in _body(production)]
+                height = 1 + max(children, default=0)
+                if height < heights.get(nt, float('inf')):
+                    heights[nt] = height
+                    changed = True
+    return heights
+
+class SentenceGenerator:
+    """Random strings of a grammar's language.
+
+    ``valid`` expands nonterminals with uniformly random productions until
+    about ``length`` terminals are produced or pending, then always takes a
+    shallowest production so the derivation ends. ``invalid`` applies one
+    random deletion, insertion or substitution to a valid string, which
+    almost always leaves the language.
+    """
+    def __init__(self, grammar, seed=0):
+        self.grammar = grammar
+        self.rng = random.Random(seed)
+        self.terminals = sorted(grammar.terminals)
+        heights = _min_heights(grammar)
+        self.choices = {}
+        self.shallowest = {}
+        for nt, productions in grammar.productions.items():
+            productive = [_body(p) for p in productions
+                          if all(s in heights or s not in grammar.nonterminals for s in _body(p))]
+            if not productive:
+                raise ValueError(f"Nonterminal {nt} derives no terminal string")
+            self.choices[nt] = productive
+            self.shallowest[nt] = min(
+                productive,
+                key=lambda p: max((heights[s] for s in p if s in grammar.nonterminals), default=0))
+
+    def valid(self, length):
+        nonterminals = self.grammar.nonterminals
+        choice = self.rng.choice
+        output = []
+        stack = [self.grammar.start_symbol]
+        while stack:
+            symbol = stack.pop()
+            if symbol not in nonterminals:
+                output.append(symbol)
+                continue
+            if len(output) + len(stack) < length:
+                production = choice(self.choices[symbol])
+            else:
+                production = self.shallowest[symbol]
+            stack.extend(reversed(production))
+        return output
+
+    def invalid(self, length):
+        tokens = self.valid(length)
+        rng = self.rng
+        position = rng.randrange(len(tokens) + 1)
+        mutation = rng.randrange(3) if tokens else 1
+        if mutation == 0:
+            del tokens[min(position, len(tokens) - 1)]
+        elif mutation == 1:
+            tokens.insert(position, rng.choice(self.terminals))
+        else:
+            position = min(position, len(tokens) - 1)
+            tokens[position] = rng.choice([t for t in self.terminals if t != tokens[position]]
+                                          or self.terminals)
+        return tokens
+
+def _measure(fn, repeat):
+    """Return ``(result, best seconds)`` over ``repeat`` calls of ``fn``."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def run_phases(grammar, inputs, repeat=3, memory=True):
+    """Time every analysis phase and both parse loops on one grammar.
+
+    Returns ``{phase: {'seconds': ..., 'peak_bytes': ...}}`` with the best
+    time of ``repeat`` runs; parse phases also get ``tokens_per_second``.
+    Peak memory is measured in a separate traced run so tracing does not
+    slow down the timings. Parse phases are left out when the grammar is
+    not LL(1) or not SLR(1).
+    """
+    results = {}
+    state = {}
+
+    def phase(name, fn, tokens=None):
+        if name.startswith('parse') and fn is None:
+            return
+        state[name], seconds = _measure(fn, repeat)
+        record = {'seconds': seconds}
+        if tokens is not None:
+            record['tokens_per_second'] = tokens / seconds if seconds else float('inf')
+        if memory:
+            tracemalloc.start()
+            try:
+                fn()
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        results[name] = record
+
+    num_tokens = sum(len(tokens) + 1 for tokens in inputs)
+    phase('first', lambda: compute_first(grammar))
+    first = state['first']
+    phase('follow', lambda: compute_follow(grammar, first))
+    follow = state['follow']
+    phase('lr0', lambda: LR0Automaton(grammar))
+    phase('ll_table', lambda: construct_ll_table(grammar, first, follow))
+    phase('slr_table', lambda: construct_slr_table(grammar, first, follow, state['lr0']))
+
+    ll_table = state['ll_table']
+    action, goto = state['slr_table']
+    ll_compiled = compile_ll_table(grammar, ll_table) if ll_table is not None else None
+    slr_compiled = compile_slr_table(grammar, action, goto) if action is not None else None
+    phase('parse_ll', ll_compiled and (lambda: [ll_parse_compiled(ll_compiled, s) for s in inputs]),
+          num_tokens)
+    phase('parse_slr', slr_compiled and (lambda: [slr_parse_compiled(slr_compiled, s) for s in inputs]),
+          num_tokens)
+    return results
+
+def run_suite(scale=1, strings=200, length=50, repeat=3, seed=0, memory=True):
+    """Benchmark every generator at ``scale`` on ``strings`` valid and as
+    many invalid inputs of about ``length`` terminals each."""
+    suite = {}
+    for name, generator in GENERATORS.items():
+        grammar = generator(8 * scale)
+        sentences = SentenceGenerator(grammar, seed)
+        inputs = ([sentences.valid(length) for _ in range(strings)]
+                  + [sentences.invalid(length) for _ in range(strings)])
+        suite[name] = {
+            'nonterminals': len(grammar.nonterminals),
+            'productions': sum(len(p) for p in grammar.productions.values()),
+            'inputs': len(inputs),
+            'phases': run_phases(grammar, inputs, repeat, memory),
+        }
+    return suite
+
+def compare(suite, baseline, tolerance=0.25):
+    """Compare the timings of ``suite`` against ``baseline``.
+
+    Returns ``(grammar, phase, ratio)`` for every phase present in both,
+    where ratio is current over baseline time, and the list of those slower
+    than ``1 + tolerance``.
+    """
+    ratios = []
+    for name, entry in suite.items():
+        base_phases = baseline.get(name, {}).get('phases', {})
+        for phase, record in entry['phases'].items():
+            base = base_phases.get(phase)
+            if base and base['seconds'] > 0:
+                ratios.append((name, phase, record['seconds'] / base['seconds']))
+    regressions = [r for r in ratios if r[2] > 1 + tolerance]
+    return ratios, regressions
+
+def format_suite(suite):
+    lines = []
+    for name, entry in suite.items():
+        lines.append(f"{name}: {entry['nonterminals']} nonterminals, "
+                     f"{entry['productions']} productions, {entry['inputs']} inputs")
+        for phase, record in entry['phases'].items():
+            line = f"  {phase:<10} {record['seconds'] * 1000:10.3f} ms"
+            if 'peak_bytes' in record:
+                line += f" {record['peak_bytes'] / 1024:10.1f} KiB peak"
+            if 'tokens_per_second' in record:
+                line += f" {record['tokens_per_second']:12.0f} tokens/s"
+            lines.append(line)
+    return "\n".join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark grammar analysis and parsing.")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="size multiplier for the generated grammars")
+    parser.add_argument('--strings', type=int, default=200,
+                        help="valid and invalid input strings per grammar")
+    parser.add_argument('--length', type=int, default=50,
+                        help="approximate terminals per input string")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per phase; the best time is kept")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the traced runs that measure peak memory")
+    parser.add_argument('--json', metavar='FILE',
+                        help="write the results as JSON to FILE ('-' for stdout)")
+    parser.add_argument('--baseline', metavar='FILE',
+                        help="compare against results stored with --json; exit 1 on a regression")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against the baseline (default: 0.25)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    suite = run_suite(args.scale, args.strings, args.length, args.repeat, args.seed,
+                      memory=not args.no_memory)
+    print(format_suite(suite), file=sys.stderr)
+
+    if args.json == '-':
+        json.dump(suite, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w') as f:
+            json.dump(suite, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        ratios, regressions = compare(suite, baseline, args.tolerance)
+        for name, phase, ratio in ratios:
+            flag = "  REGRESSION" if (name, phase, ratio) in regressions else ""
+            print(f"{name}.{phase}: {ratio:.2f}x baseline{flag}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
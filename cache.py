@@ -0,0 +1,152 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from tables import CompiledLLTable, CompiledSLRTable
+
+# File layout: header, marshalled metadata, then the raw table arrays, each
+# starting on an 8-byte boundary so they can be used straight from the map
+MAGIC = b'GRMC'
+# Bumped whenever the layout or the tables built for a grammar change; it
+# is part of the grammar hash, so older files are never even opened
+VERSION = 2
+HEADER = struct.Struct('<4sIQ')  # magic, version, metadata length
+ALIGNMENT = 8
+
+# Array-valued attributes of each compiled table type
+LL_ARRAYS = ('production_lhs', 'table')
+SLR_ARRAYS = ('reduce_length', 'reduce_lhs', 'action', 'goto')
+
+class CacheEntry:
+    """FIRST/FOLLOW sets and compiled tables loaded from the cache.
+
+    A table is None when the grammar is not LL(1) or SLR(1).
+    """
+    def __init__(self, first, follow, ll_table, slr_table):
+        self.first = first
+        self.follow = follow
+        self.ll_table = ll_table
+        self.slr_table = slr_table
+
+def grammar_hash(grammar):
+    """Return a hex digest identifying the grammar's start symbol and
+    productions, independent of the order nonterminals were added in, and
+    the cache format version."""
+    canonical = (
+        VERSION,
+        grammar.start_symbol,
+        tuple(sorted((nt, tuple(prods)) for nt, prods in grammar.productions.items())),
+    )
+    return hashlib.sha256(repr(canonical).encode('utf-8')).hexdigest()
+
+def cache_path(cache_dir, grammar):
+    return os.path.join(cache_dir, grammar_hash(grammar) + '.grm')
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _table_meta(table, names):
+    if table is None:
+        return None
+    return {
+        'terminal_ids': table.terminal_ids,
+        'nonterminal_ids': table.nonterminal_ids,
+        'productions': table.productions,
+        'arrays': {name: (getattr(table, name).typecode, len(getattr(table, name)))
+                   for name in names},
+    }
+
+def store(cache_dir, grammar, first, follow, ll_table, slr_table):
+    """Write the analysis of ``grammar`` to ``cache_dir``."""
+    tables = [(ll_table, LL_ARRAYS), (slr_table, SLR_ARRAYS)]
+    meta = {
+        'byteorder': sys.byteorder,
+        'first': first,
+        'follow': follow,
+        'll': _table_meta(ll_table, LL_ARRAYS),
+        'slr': _table_meta(slr_table, SLR_ARRAYS),
+    }
+    meta_bytes = marshal.dumps(meta)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(cache_dir, grammar)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta_bytes)))
+        f.write(meta_bytes)
+        for table, names in tables:
+            if table is None:
+                continue
+            for name in names:
+                f.write(b'\0' * (_align(f.tell()) - f.tell()))
+                getattr(table, name).tofile(f)
+    # Readers only ever see complete files
+    os.replace(tmp_path, path)
+    return path
+
+def load(cache_dir, grammar):
+    """Return the cached CacheEntry for ``grammar``, or None on a miss.
+
+    The table arrays are memoryviews over a read-only memory map of the
+    file, so nothing is copied or parsed beyond the metadata.
+    """
+    path = cache_path(cache_dir, grammar)
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    entry = _read(mapped)
+    if entry is None:
+        # _read keeps no view of the map once it returns
+        mapped.close()
+    return entry
+
+def _read(mapped):
+    try:
+        magic, version, meta_len = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or version != VERSION:
+            return None
+        offset = HEADER.size
+        meta = marshal.loads(mapped[offset:offset + meta_len])
+        if meta['byteorder'] != sys.byteorder:
+            return None
+        offset += meta_len
+
+        view = memoryview(mapped)
+        loaded = {}
+        for key, names in (('ll', LL_ARRAYS), ('slr', SLR_ARRAYS)):
+            table_meta = meta[key]
+            if table_meta is None:
+                loaded[key] = None
+                continue
+            arrays = {}
+            for name in names:
+                typecode, count = table_meta['arrays'][name]
+                offset = _align(offset)
+                size = count * array(typecode).itemsize
+                if offset + size > len(mapped):
+                    return None
+                arrays[name] = view[offset:offset + size].cast(typecode)
+                offset += size
+            loaded[key] = (table_meta, arrays)
+    except (struct.error, EOFError, ValueError, TypeError, KeyError):
+        return None
+
+    ll_table = slr_table = None
+    if loaded['ll'] is not None:
+        table_meta, arrays = loaded['ll']
+        ll_table = CompiledLLTable(table_meta['terminal_ids'], table_meta['nonterminal_ids'],
+                                   table_meta['productions'], arrays['production_lhs'],
+                                   arrays['table'])
+    if loaded['slr'] is not None:
+        table_meta, arrays = loaded['slr']
+        slr_table = CompiledSLRTable(table_meta['terminal_ids'], table_meta['nonterminal_ids'],
+                                     table_meta['productions'], arrays['reduce_length'],
+                                     arrays['reduce_lhs'], arrays['action'], arrays['goto'])
+    return CacheEntry(meta['first'], meta['follow'], ll_table, slr_table)
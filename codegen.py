@@ -0,0 +1,185 @@
+from tables import ACCEPT, CompiledLLTable, END
+
+# The generated modules hold the tables as nested tuples indexed by state
+# (or stack symbol) and terminal ID, which is faster to index than the flat
+# arrays, and import nothing
+
+_LL_TEMPLATE = '''\
+"""LL(1) parser for one grammar, generated by codegen.py; do not edit.
+
+``parse(input_string)`` and ``parse_ids(tokens)`` accept exactly what
+``ll_parse_compiled`` and ``ll_parse_ids`` accept with the table this
+module was generated from.
+"""
+
+TERMINALS = {terminals!r}
+PRODUCTIONS = {productions!r}
+
+_UNKNOWN = {unknown}
+_END = {end}
+_START = {start}
+
+# Indexed by stack symbol: None for terminals, and for nonterminals a row
+# with, per terminal ID, the symbols to push (already reversed) or None
+_TABLE = (
+{rows}
+)
+
+def parse(input_string):
+    """Return whether the input string (or symbol sequence) is accepted."""
+    ids = TERMINALS
+    tokens = [ids.get(symbol, _UNKNOWN) for symbol in input_string]
+    if not tokens or tokens[-1] != _END:
+        tokens.append(_END)
+    return parse_ids(tokens)
+
+def parse_ids(tokens):
+    """Return whether the terminal IDs, ending with the end marker, are
+    accepted."""
+    table = _TABLE
+    stack = [_END, _START]
+    pop = stack.pop
+    extend = stack.extend
+    tokens = iter(tokens)
+    symbol = next(tokens, None)
+
+    while stack:
+        top = pop()
+        row = table[top]
+        if row is None:
+            if symbol is not None and symbol == top:
+                symbol = next(tokens, None)
+            elif top == _END and symbol is None:
+                return True
+            else:
+                return False
+        else:
+            if symbol is None:
+                return False
+            push = row[symbol]
+            if push is None:
+                return False
+            extend(push)
+
+    return symbol is None
+'''
+
+_SLR_TEMPLATE = '''\
+"""SLR(1) parser for one grammar, generated by codegen.py; do not edit.
+
+``parse(input_string)`` and ``parse_ids(tokens)`` accept exactly what
+``slr_parse_compiled`` and ``slr_parse_ids`` accept with the tables this
+module was generated from.
+"""
+
+TERMINALS = {terminals!r}
+PRODUCTIONS = {productions!r}
+
+_UNKNOWN = {unknown}
+_END = {end}
+
+# One row per state with, per terminal ID, n > 0 to shift to state n - 1,
+# {accept} to accept, n < {accept} to reduce by production -n - 2, or 0
+_ACTION = (
+{action}
+)
+
+# One column per nonterminal: the goto state of each state
+_GOTO = (
+{goto}
+)
+
+# Per production: the states a reduce pops and the goto column it uses
+_REDUCE = (
+{reduce}
+)
+
+def parse(input_string):
+    """Return whether the input string (or symbol sequence) is accepted."""
+    ids = TERMINALS
+    tokens = [ids.get(symbol, _UNKNOWN) for symbol in input_string]
+    if not tokens or tokens[-1] != _END:
+        tokens.append(_END)
+    return parse_ids(tokens)
+
+def parse_ids(tokens):
+    """Return whether the terminal IDs, ending with the end marker, are
+    accepted."""
+    action = _ACTION
+    reduce = _REDUCE
+    stack = [0]
+    push = stack.append
+    state = 0
+    tokens = iter(tokens)
+    symbol = next(tokens, _END)
+
+    while True:
+        act = action[state][symbol]
+        if act > 0:
+            state = act - 1
+            push(state)
+            symbol = next(tokens, _END)
+        elif act < {accept}:
+            length, column = reduce[-act - 2]
+            if length:
+                del stack[-length:]
+            state = column[stack[-1]]
+            push(state)
+        else:
+            return act == {accept}
+'''
+
+def _rows(rows):
+    return "\n".join(f"    {row!r}," for row in rows)
+
+def generate_ll_module(table):
+    """Return the source of a standalone module parsing with a
+    CompiledLLTable."""
+    width = table.width
+    num_terminals = table.num_terminals
+    rows = [None] * num_terminals
+    for nt_id in range(len(table.nonterminal_ids)):
+        cells = table.table[nt_id * width:(nt_id + 1) * width]
+        rows.append(tuple(table.push[p] if p >= 0 else None for p in cells))
+    return _LL_TEMPLATE.format(
+        terminals=dict(table.terminal_ids),
+        productions=tuple(table.productions),
+        unknown=num_terminals,
+        end=END,
+        start=table.start,
+        rows=_rows(rows),
+    )
+
+def generate_slr_module(table):
+    """Return the source of a standalone module parsing with a
+    CompiledSLRTable."""
+    width = table.width
+    num_nonterminals = table.num_nonterminals
+    num_states = table.num_states
+    action = [tuple(table.action[s * width:(s + 1) * width]) for s in range(num_states)]
+    goto = [tuple(table.goto[s * num_nonterminals + nt] for s in range(num_states))
+            for nt in range(num_nonterminals)]
+    reduce = "\n".join(f"    ({length}, _GOTO[{lhs}]),"
+                       for length, lhs in zip(table.reduce_length, table.reduce_lhs))
+    return _SLR_TEMPLATE.format(
+        terminals=dict(table.terminal_ids),
+        productions=tuple(table.productions),
+        unknown=table.num_terminals,
+        end=END,
+        accept=ACCEPT,
+        action=_rows(action),
+        goto=_rows(goto),
+        reduce=reduce,
+    )
+
+def generate_module(table):
+    """Return the source of a standalone parser module for a compiled
+    LL(1) or SLR(1) (or LALR(1)) table."""
+    if isinstance(table, CompiledLLTable):
+        return generate_ll_module(table)
+    return generate_slr_module(table)
+
+def write_module(table, path):
+    """Write the module of ``generate_module`` to ``path``."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(generate_module(table))
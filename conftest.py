@@ -0,0 +1,14 @@
+import signal
+
+import pytest
+
+@pytest.fixture
+def deadline():
+    # Fails a parse that does not end instead of hanging the test run
+    def expire(signum, frame):
+        raise TimeoutError("parse did not terminate")
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.alarm(60)
+    yield
+    signal.alarm(0)
+    signal.signal(signal.SIGALRM, previous)
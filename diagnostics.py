@@ -0,0 +1,150 @@
+import time
+
+class Conflict:
+    """One conflicting cell of an LL(1) or LR parsing table.
+
+    ``kind`` is ``'first/first'`` or ``'first/follow'`` for LL(1) tables and
+    ``'shift/reduce'``, ``'reduce/reduce'`` or ``'accept/reduce'`` for LR
+    tables. The cell is ``table[nonterminal][lookahead]`` for LL(1) and
+    ``action[state][lookahead]`` for LR. ``choices`` are the competing
+    entries (productions for LL(1), actions for LR), the one left in the
+    table first, and ``items`` are the LR items that produce them.
+    """
+    def __init__(self, kind, lookahead, choices, state=None, nonterminal=None, items=()):
+        self.kind = kind
+        self.lookahead = lookahead
+        self.choices = choices
+        self.state = state
+        self.nonterminal = nonterminal
+        self.items = items
+
+    def __str__(self):
+        where = f"state {self.state}" if self.state is not None else f"nonterminal {self.nonterminal}"
+        choices = ", ".join(_format_choice(choice) for choice in self.choices)
+        result = f"{self.kind} conflict in {where} on '{self.lookahead}': {choices}"
+        if self.items:
+            result += " from " + " ".join(str(item) for item in self.items)
+        return result
+
+    def __repr__(self):
+        return str(self)
+
+def _format_choice(choice):
+    if isinstance(choice, tuple) and len(choice) == 2 and choice[0] in ('shift', 'reduce', 'accept'):
+        act, value = choice
+        if act == 'shift':
+            return f"shift {value}"
+        if act == 'reduce':
+            nt, prod = value
+            return f"reduce {nt} -> {format_production(prod)}"
+        return "accept"
+    return format_production(choice)
+
+def format_production(production):
+    """Render a production body the way grammars are written: strings as
+    they are, symbol sequences separated by spaces, and 'e' when empty."""
+    if not production:
+        return 'e'
+    if isinstance(production, str):
+        return production
+    return ' '.join(production)
+
+def lr_conflict_kind(choices):
+    acts = {act for act, _ in choices}
+    if 'shift' in acts:
+        return 'shift/reduce'
+    if 'accept' in acts:
+        return 'accept/reduce'
+    return 'reduce/reduce'
+
+def resolve_conflicts(table, conflicts, choose):
+    """Re-resolve the recorded conflicts of a table without rebuilding it.
+
+    ``table`` is an LL(1) table or an LR action table built with conflict
+    collection; ``choose(conflict)`` returns the entry to keep, normally one
+    of ``conflict.choices``.
+    """
+    for conflict in conflicts:
+        row = conflict.state if conflict.state is not None else conflict.nonterminal
+        table[row][conflict.lookahead] = choose(conflict)
+
+class ParseError:
+    """A syntax error found by a recovering parse: ``symbol`` was read at
+    input ``position`` where one of the terminals in ``expected`` was
+    required."""
+    def __init__(self, position, symbol, expected):
+        self.position = position
+        self.symbol = symbol
+        self.expected = expected
+
+    def __str__(self):
+        expected = ", ".join(f"'{terminal}'" for terminal in self.expected)
+        return f"unexpected '{self.symbol}' at position {self.position}, expected {expected}"
+
+    def __repr__(self):
+        return str(self)
+
+def record_error(errors, position, symbol, expected):
+    """Append a ParseError unless one was already recorded at ``position``,
+    so recovery does not report the same spot twice."""
+    if not errors or errors[-1].position != position:
+        errors.append(ParseError(position, symbol, tuple(sorted(expected))))
+
+class ParseProfile:
+    """Counters filled in by the instrumented parse drivers.
+
+    Pass an instance as ``profile`` to ``ll_parse``, ``slr_parse`` or their
+    compiled forms and the parse is run by an instrumented copy of the
+    driver; the plain drivers have no counting code at all. Counts add up
+    over every parse the profile is passed to:
+
+    * ``states``: LR state -> action lookups made in it
+    * ``cells``: LL ``(nonterminal, lookahead)`` -> expansions through it
+    * ``shifts``: terminal -> times shifted (LR) or matched (LL)
+    * ``reductions``: ``(nonterminal, production)`` -> reductions (LR) or
+      expansions (LL)
+    * ``max_depth``: deepest parse stack seen
+    * ``timings``: wall time in seconds of each parse, in order
+    """
+    def __init__(self):
+        self.states = {}
+        self.cells = {}
+        self.shifts = {}
+        self.reductions = {}
+        self.max_depth = 0
+        self.timings = []
+        self.accepted = 0
+
+    def record(self, started, accepted, depth):
+        """Close one parse that began at ``perf_counter()`` time ``started``."""
+        self.timings.append(time.perf_counter() - started)
+        if accepted:
+            self.accepted += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def as_dict(self):
+        """Return the counters as JSON-ready data. Every list is sorted by
+        count, hottest first, which is the order in which to lay out states
+        or try productions for the fastest dispatch."""
+        def ranked(counts):
+            return sorted(counts.items(), key=lambda item: -item[1])
+
+        timings = self.timings
+        return {
+            'parses': len(timings),
+            'accepted': self.accepted,
+            'max_depth': self.max_depth,
+            'time': {
+                'total': sum(timings),
+                'mean': sum(timings) / len(timings) if timings else 0.0,
+                'max': max(timings, default=0.0),
+            },
+            'timings': list(timings),
+            'states': [{'state': state, 'visits': n} for state, n in ranked(self.states)],
+            'cells': [{'nonterminal': nt, 'lookahead': terminal, 'count': n}
+                      for (nt, terminal), n in ranked(self.cells)],
+            'shifts': [{'terminal': terminal, 'count': n} for terminal, n in ranked(self.shifts)],
+            'reductions': [{'nonterminal': nt, 'production': format_production(production), 'count': n}
+                           for (nt, production), n in ranked(self.reductions)],
+        }
@@ -1,5 +1,56 @@
-def compute_first(grammar):
-    """Compute the FIRST set for all symbols in the grammar."""
+import time
+
+class SolverStats:
+    """Iteration counts, phase timings and set sizes of a FIRST/FOLLOW run.
+
+    Pass an instance as ``stats`` to ``compute_first``/``compute_follow`` to
+    have it filled in; nothing is measured when ``stats`` is None. If a
+    ``callback`` is given it is called as ``callback(phase, seconds)`` each
+    time a phase finishes.
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.iterations = {}  # 'first'/'follow' -> sweeps or components solved
+        self.timings = {}     # phase name -> wall time in seconds
+        self.set_sizes = {}   # 'first'/'follow' -> {symbol: size of its set}
+
+    def lap(self, phase, started):
+        """Record the time since ``started`` for ``phase`` and return now."""
+        now = time.perf_counter()
+        self.timings[phase] = self.timings.get(phase, 0.0) + now - started
+        if self.callback is not None:
+            self.callback(phase, now - started)
+        return now
+
+    def as_dict(self):
+        return {
+            'iterations': dict(self.iterations),
+            'timings': dict(self.timings),
+            'set_sizes': {name: dict(sizes) for name, sizes in self.set_sizes.items()},
+        }
+
+def compute_first(grammar, solver='worklist', stats=None):
+    """Compute the FIRST set for all symbols in the grammar.
+
+    ``solver`` selects the algorithm: ``'worklist'`` propagates along the
+    symbol dependency graph once, ``'fixpoint'`` re-scans every production
+    until nothing changes. Both return the same sets. ``stats`` is an
+    optional ``SolverStats`` to record the run in.
+    """
+    if solver == 'worklist':
+        first = _first_worklist(grammar, stats)
+    elif solver == 'fixpoint':
+        first = _first_fixpoint(grammar, stats)
+    else:
+        raise ValueError(f"Unknown solver: {solver}")
+
+    if stats is not None:
+        stats.set_sizes['first'] = {nt: len(first[nt]) for nt in grammar.nonterminals}
+    return first
+
+def _first_fixpoint(grammar, stats=None):
+    if stats is not None:
+        started = time.perf_counter()
     first = {nt: set() for nt in grammar.nonterminals}
     
     # Add FIRST for all terminals
@@ -10,8 +61,10 @@ def compute_first(grammar):
     first['e'] = {'e'}
     
     # Repeat until no changes are made
+    sweeps = 0
     while True:
         updated = False
+        sweeps += 1
         
         for nonterminal in grammar.nonterminals:
             for production in grammar.productions[nonterminal]:
@@ -53,21 +106,40 @@ def compute_first(grammar):
         if not updated:
             break
     
-    print("FIRST sets computed:")
-    for nt, fset in first.items():
-        print(f"FIRST({nt}) = {fset}")
+    if stats is not None:
+        stats.iterations['first'] = sweeps
+        stats.lap('first.fixpoint', started)
     return first
 
-def compute_follow(grammar, first):
-    """Compute the FOLLOW set for all nonterminals in the grammar."""
+def compute_follow(grammar, first, solver='worklist', stats=None):
+    """Compute the FOLLOW set for all nonterminals in the grammar.
+
+    ``solver`` and ``stats`` work as in ``compute_first``.
+    """
+    if solver == 'worklist':
+        follow = _follow_worklist(grammar, first, stats)
+    elif solver == 'fixpoint':
+        follow = _follow_fixpoint(grammar, first, stats)
+    else:
+        raise ValueError(f"Unknown solver: {solver}")
+
+    if stats is not None:
+        stats.set_sizes['follow'] = {nt: len(fset) for nt, fset in follow.items()}
+    return follow
+
+def _follow_fixpoint(grammar, first, stats=None):
+    if stats is not None:
+        started = time.perf_counter()
     follow = {nt: set() for nt in grammar.nonterminals}
     
     # Add $ to FOLLOW(S)
     follow[grammar.start_symbol].add('$')
     
     # Repeat until no changes are made
+    sweeps = 0
     while True:
         updated = False
+        sweeps += 1
         
         for nonterminal in grammar.nonterminals:
             for production in grammar.productions[nonterminal]:
@@ -120,11 +192,357 @@ def compute_follow(grammar, first):
         if not updated:
             break
     
-    print("FOLLOW sets computed:")
-    for nt, fset in follow.items():
-        print(f"FOLLOW({nt}) = {fset}")
+    if stats is not None:
+        stats.iterations['follow'] = sweeps
+        stats.lap('follow.fixpoint', started)
+    return follow
+
+def compute_nullable(grammar):
+    """Compute the set of nonterminals that derive the empty string."""
+    nullable = set()
+    # For each production, the number of symbols not yet known to be nullable
+    remaining = {}
+    # Nonterminal -> productions in which it occurs
+    occurrences = {nt: [] for nt in grammar.nonterminals}
+    worklist = []
+
+    for nonterminal in grammar.nonterminals:
+        for k, production in enumerate(grammar.productions[nonterminal]):
+            if production == 'e':
+                worklist.append(nonterminal)
+                continue
+            # A terminal anywhere means the production can never be empty
+            if any(symbol not in grammar.nonterminals for symbol in production):
+                continue
+            remaining[(nonterminal, k)] = len(production)
+            if not production:
+                worklist.append(nonterminal)
+            for symbol in production:
+                occurrences[symbol].append((nonterminal, k))
+
+    while worklist:
+        nonterminal = worklist.pop()
+        if nonterminal in nullable:
+            continue
+        nullable.add(nonterminal)
+        for key in occurrences[nonterminal]:
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                worklist.append(key[0])
+
+    return nullable
+
+def compute_suffix_first(grammar, first):
+    """Compute FIRST of every production suffix.
+
+    Returns a dict mapping ``(nonterminal, k)`` to a list whose entry ``i``
+    is FIRST of ``productions[nonterminal][k][i:]``; the last entry is
+    ``{'e'}`` for the empty suffix.
+    """
+    suffix_first = {}
+    for nonterminal in grammar.nonterminals:
+        for k, production in enumerate(grammar.productions[nonterminal]):
+            suffix_first[(nonterminal, k)] = _production_suffix_first(grammar, first, production)
+    return suffix_first
+
+def _production_suffix_first(grammar, first, production):
+    if production == 'e':
+        return [{'e'}]
+    suffixes = [None] * len(production) + [{'e'}]
+    for i in range(len(production) - 1, -1, -1):
+        symbol = production[i]
+        if symbol not in grammar.nonterminals:
+            suffixes[i] = {symbol}
+        elif 'e' in first[symbol]:
+            suffixes[i] = (first[symbol] - {'e'}) | suffixes[i + 1]
+        else:
+            suffixes[i] = first[symbol]
+    return suffixes
+
+def _strongly_connected_components(nodes, edges):
+    """Return the strongly connected components of a graph in topological
+    order, so every component comes after the components with edges into it.
+    """
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges[root]))]
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = len(index)
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(edges[successor])))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    # Tarjan emits a component only after everything reachable from it
+    components.reverse()
+    return components
+
+def propagate_sets(nodes, direct, edges):
+    """Solve ``sets[b] |= sets[a]`` for every edge ``a -> b``, starting
+    from ``direct``.
+
+    Cycles are collapsed into a single component and components are visited
+    in dependency order, so each one is computed exactly once. Returns the
+    sets and the number of components.
+    """
+    predecessors = {node: [] for node in nodes}
+    for node in nodes:
+        for successor in edges[node]:
+            predecessors[successor].append(node)
+
+    sets = {}
+    components = _strongly_connected_components(nodes, edges)
+    for component in components:
+        members = set(component)
+        result = set()
+        for node in component:
+            result |= direct[node]
+            for predecessor in predecessors[node]:
+                if predecessor not in members:
+                    result |= sets[predecessor]
+        for node in component:
+            sets[node] = result
+    return sets, len(components)
+
+def _first_worklist(grammar, stats=None):
+    if stats is not None:
+        started = time.perf_counter()
+    nonterminals = grammar.nonterminals
+    nullable = compute_nullable(grammar)
+    if stats is not None:
+        started = stats.lap('first.nullable', started)
+
+    # FIRST(nonterminal) gets the terminals that can start one of its
+    # productions directly, plus FIRST of every nonterminal that can start
+    # one after a nullable prefix
+    direct = {nt: set() for nt in nonterminals}
+    edges = {nt: set() for nt in nonterminals}
+    for nonterminal in nonterminals:
+        for production in grammar.productions[nonterminal]:
+            if production == 'e':
+                continue
+            for symbol in production:
+                if symbol not in nonterminals:
+                    if symbol != 'e':
+                        direct[nonterminal].add(symbol)
+                    break
+                edges[symbol].add(nonterminal)
+                if symbol not in nullable:
+                    break
+    if stats is not None:
+        started = stats.lap('first.graph', started)
+
+    solved, components = propagate_sets(list(nonterminals), direct, edges)
+
+    first = {}
+    for nt in nonterminals:
+        first[nt] = set(solved[nt])
+        if nt in nullable:
+            first[nt].add('e')
+    for terminal in grammar.terminals:
+        first[terminal] = {terminal}
+    first['e'] = {'e'}
+    if stats is not None:
+        stats.iterations['first'] = components
+        stats.lap('first.propagate', started)
+    return first
+
+def _follow_worklist(grammar, first, stats=None):
+    if stats is not None:
+        started = time.perf_counter()
+    nonterminals = grammar.nonterminals
+    suffix_first = compute_suffix_first(grammar, first)
+    if stats is not None:
+        started = stats.lap('follow.suffix_first', started)
+
+    # FOLLOW(symbol) gets FIRST of what comes after it in each production,
+    # plus FOLLOW of the left-hand side when that rest can be empty
+    direct = {nt: set() for nt in nonterminals}
+    edges = {nt: set() for nt in nonterminals}
+    direct[grammar.start_symbol].add('$')
+    for nonterminal in nonterminals:
+        for k, production in enumerate(grammar.productions[nonterminal]):
+            if production == 'e':
+                continue
+            suffixes = suffix_first[(nonterminal, k)]
+            for i, symbol in enumerate(production):
+                if symbol in nonterminals:
+                    rest = suffixes[i + 1]
+                    direct[symbol] |= rest - {'e'}
+                    if 'e' in rest:
+                        edges[nonterminal].add(symbol)
+    if stats is not None:
+        started = stats.lap('follow.graph', started)
+
+    solved, components = propagate_sets(list(nonterminals), direct, edges)
+    follow = {nt: set(solved[nt]) for nt in nonterminals}
+    if stats is not None:
+        stats.iterations['follow'] = components
+        stats.lap('follow.propagate', started)
     return follow
 
+def update_first(grammar, first, changed):
+    """Recompute FIRST after the productions of the nonterminals in
+    ``changed`` were edited in ``grammar``.
+
+    Only the changed nonterminals and those whose productions can start
+    with one of them, directly or through other nonterminals, are solved
+    again; every other set is taken from ``first`` as it is. Returns the new
+    FIRST sets and the set of nonterminals whose FIRST set changed.
+    """
+    nonterminals = grammar.nonterminals
+    was_nullable = {nt for nt in nonterminals if 'e' in first.get(nt, ())}
+
+    # symbol -> productions that contain it
+    occurrences = {nt: [] for nt in nonterminals}
+    for nonterminal in nonterminals:
+        for production in grammar.productions[nonterminal]:
+            if production == 'e':
+                continue
+            for symbol in set(production):
+                if symbol in occurrences:
+                    occurrences[symbol].append((nonterminal, production))
+
+    # A production depends on a symbol that can come first in it: every
+    # symbol before it was nullable or may have become so by being affected
+    affected = set(changed) & nonterminals
+    worklist = list(affected)
+    while worklist:
+        symbol = worklist.pop()
+        for nonterminal, production in occurrences[symbol]:
+            if nonterminal in affected:
+                continue
+            for s in production:
+                if s == symbol:
+                    affected.add(nonterminal)
+                    worklist.append(nonterminal)
+                    break
+                if s not in was_nullable and s not in affected:
+                    break
+
+    nullable = {nt for nt in nonterminals - affected if 'e' in first[nt]}
+    updated = True
+    while updated:
+        updated = False
+        for nonterminal in affected - nullable:
+            for production in grammar.productions[nonterminal]:
+                if production == 'e' or all(s in nullable for s in production):
+                    nullable.add(nonterminal)
+                    updated = True
+                    break
+
+    # As in _first_worklist, restricted to the affected nonterminals; the
+    # others only contribute their known sets
+    direct = {nt: set() for nt in affected}
+    edges = {nt: set() for nt in affected}
+    for nonterminal in affected:
+        for production in grammar.productions[nonterminal]:
+            if production == 'e':
+                continue
+            for symbol in production:
+                if symbol not in nonterminals:
+                    if symbol != 'e':
+                        direct[nonterminal].add(symbol)
+                    break
+                if symbol in affected:
+                    edges[symbol].add(nonterminal)
+                else:
+                    direct[nonterminal] |= first[symbol] - {'e'}
+                if symbol not in nullable:
+                    break
+    solved, _ = propagate_sets(list(affected), direct, edges)
+
+    old_first = first
+    first = {symbol: sets for symbol, sets in first.items()
+             if symbol in nonterminals or symbol in grammar.terminals or symbol == 'e'}
+    for nt in affected:
+        first[nt] = set(solved[nt])
+        if nt in nullable:
+            first[nt].add('e')
+    for terminal in grammar.terminals:
+        first.setdefault(terminal, {terminal})
+    return first, {nt for nt in affected if first[nt] != old_first.get(nt)}
+
+def update_follow(grammar, first, follow, seeds):
+    """Recompute FOLLOW after an edit, given the up-to-date ``first``.
+
+    ``seeds`` are the nonterminals whose FOLLOW may have changed directly:
+    those in the edited productions and those in a production with a
+    nonterminal whose FIRST changed. They and every nonterminal that
+    inherits FOLLOW from one of them, at the end of a production up to a
+    nullable rest, are solved again; the other sets are taken from
+    ``follow``. Returns the new FOLLOW sets and the set of nonterminals
+    whose FOLLOW set changed.
+    """
+    nonterminals = grammar.nonterminals
+    # New nonterminals have no set yet
+    affected = (set(seeds) | (nonterminals - follow.keys())) & nonterminals
+    worklist = list(affected)
+    while worklist:
+        for production in grammar.productions[worklist.pop()]:
+            suffixes = _production_suffix_first(grammar, first, production)
+            for i, symbol in enumerate(() if production == 'e' else production):
+                if symbol in nonterminals and symbol not in affected and 'e' in suffixes[i + 1]:
+                    affected.add(symbol)
+                    worklist.append(symbol)
+
+    # As in _follow_worklist, over the productions that mention an
+    # affected nonterminal
+    direct = {nt: set() for nt in affected}
+    edges = {nt: set() for nt in affected}
+    if grammar.start_symbol in affected:
+        direct[grammar.start_symbol].add('$')
+    for nonterminal in nonterminals:
+        for production in grammar.productions[nonterminal]:
+            if production == 'e' or not any(s in affected for s in production):
+                continue
+            suffixes = _production_suffix_first(grammar, first, production)
+            for i, symbol in enumerate(production):
+                if symbol in affected:
+                    rest = suffixes[i + 1]
+                    direct[symbol] |= rest - {'e'}
+                    if 'e' in rest:
+                        if nonterminal in affected:
+                            edges[nonterminal].add(symbol)
+                        else:
+                            direct[symbol] |= follow[nonterminal]
+    solved, _ = propagate_sets(list(affected), direct, edges)
+
+    old_follow = follow
+    follow = {nt: sets for nt, sets in follow.items() if nt in nonterminals}
+    for nt in affected:
+        follow[nt] = set(solved[nt])
+    return follow, {nt for nt in affected if follow[nt] != old_follow.get(nt)}
+
 def compute_first_of_string(first, string):
     """Compute the FIRST set of a string of grammar symbols."""
     if not string or string == 'e':
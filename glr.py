@@ -0,0 +1,265 @@
+from parse_tree import Node
+
+class ForestNode:
+    """A node of a shared packed parse forest.
+
+    ``symbol`` derives ``input[start:end]``. Terminal leaves have no
+    alternatives; a nonterminal node has one ``(production, children)``
+    alternative per distinct way it was derived, so it is ambiguous when it
+    has more than one. Children are ForestNodes shared between every
+    derivation that uses them, and a forest is cyclic when the grammar
+    allows ``A =>+ A``.
+    """
+    __slots__ = ('symbol', 'start', 'end', 'alternatives', '_seen')
+
+    def __init__(self, symbol, start, end):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.alternatives = []
+        self._seen = set()
+
+    def add(self, production, children):
+        key = (production, tuple(map(id, children)))
+        if key not in self._seen:
+            self._seen.add(key)
+            self.alternatives.append((production, tuple(children)))
+
+    @property
+    def ambiguous(self):
+        return len(self.alternatives) > 1
+
+    def __str__(self):
+        return f"{self.symbol}[{self.start}:{self.end}]"
+
+    def __repr__(self):
+        return str(self)
+
+class _StackNode:
+    # A vertex of the graph-structured stack; edges map the vertex below
+    # to the forest node of the symbol between them
+    __slots__ = ('state', 'level', 'edges')
+
+    def __init__(self, state, level):
+        self.state = state
+        self.level = level
+        self.edges = {}
+
+def construct_glr_table(tables, conflicts):
+    """Turn LR ``(action, goto)`` tables built with conflict collection into
+    a GLR table ``(action, goto)`` whose action cells are tuples of every
+    competing action, so no conflict is resolved away."""
+    action, goto = tables
+    glr_action = [{terminal: (entry,) for terminal, entry in row.items()} for row in action]
+    for conflict in conflicts:
+        glr_action[conflict.state][conflict.lookahead] = tuple(conflict.choices)
+    return glr_action, goto
+
+def glr_parse(action, goto, input_string):
+    """Return whether the input string (or symbol sequence) is accepted,
+    given the tables of ``construct_glr_table``."""
+    return glr_parse_forest(action, goto, input_string) is not None
+
+def glr_parse_forest(action, goto, input_string):
+    """Parse with a graph-structured stack, following every action of a
+    conflicting cell at once, and return the root ForestNode of all parse
+    trees, or None if the input is rejected.
+
+    Stack tops in the same state at the same input position are merged and
+    subtrees over the same span are shared, so the work stays polynomial
+    even for ambiguous grammars.
+    """
+    tokens = list(input_string)
+    if not tokens or tokens[-1] != '$':
+        tokens.append('$')
+
+    bottom = _StackNode(0, 0)
+    frontier = {0: bottom}
+    for i, symbol in enumerate(tokens):
+        frontier, root = _reduce_all(action, goto, frontier, symbol, i, bottom)
+        if symbol == '$':
+            return root
+        leaf = ForestNode(symbol, i, i + 1)
+        shifted = {}
+        for node in frontier.values():
+            for act, value in action[node.state].get(symbol, ()):
+                if act == 'shift':
+                    target = shifted.get(value)
+                    if target is None:
+                        target = shifted[value] = _StackNode(value, i + 1)
+                    target.edges[node] = leaf
+        if not shifted:
+            return None
+        frontier = shifted
+    return None
+
+def _reduce_all(action, goto, frontier, symbol, i, bottom):
+    # Apply every reduction possible on ``symbol`` at position i until the
+    # frontier stops growing; returns the frontier and, on '$', the root
+    forest = {}  # (nonterminal, start) -> ForestNode ending at i
+    queue = []
+    # Set once an edge joins two vertices of this position, after which a
+    # new edge can lie in the middle of paths from other vertices
+    inner = False
+    # (vertex, reduction) queued along all paths, which will take any edge
+    # added meanwhile
+    unreduced = set()
+
+    def schedule(node, required=None):
+        # Queue the reductions of node; with ``required``, only along
+        # paths through that new edge
+        for act, value in action[node.state].get(symbol, ()):
+            if act != 'reduce':
+                continue
+            if required is None:
+                queue.append((node, value, None))
+                unreduced.add((node, value))
+            elif len(value[1]) > 0 and (node, value) not in unreduced:
+                queue.append((node, value, required))
+
+    for node in list(frontier.values()):
+        schedule(node)
+
+    while queue:
+        node, (nt, production), required = queue.pop()
+        if required is None:
+            unreduced.discard((node, (nt, production)))
+        for below, children in _paths(node, len(production), required):
+            state = goto[below.state][nt]
+            label = forest.get((nt, below.level))
+            if label is None:
+                label = forest[(nt, below.level)] = ForestNode(nt, below.level, i)
+            label.add(production, children)
+
+            target = frontier.get(state)
+            if target is None:
+                target = frontier[state] = _StackNode(state, i)
+                target.edges[below] = label
+                inner = inner or below.level == i
+                schedule(target)
+            elif below not in target.edges:
+                target.edges[below] = label
+                inner = inner or below.level == i
+                edge = (target, below)
+                if inner:
+                    for other in list(frontier.values()):
+                        schedule(other, edge)
+                else:
+                    schedule(target, edge)
+
+    root = None
+    if symbol == '$':
+        for node in frontier.values():
+            if ('accept', None) in action[node.state].get('$', ()):
+                root = node.edges.get(bottom)
+    return frontier, root
+
+def _paths(node, length, required):
+    # Yield (vertex, children) for every path of ``length`` edges down from
+    # node, children left to right; with ``required``, only the paths that
+    # use that (upper, lower) edge. Levels do not increase down a path, so
+    # one that is below the edge's upper vertex without having used it is
+    # dropped at once
+    if length == 0:
+        yield node, []
+        return
+    floor = required[0].level if required is not None else -1
+    stack = [(node, length, [], required is None)]
+    while stack:
+        vertex, remaining, labels, used = stack.pop()
+        if remaining == 0:
+            if used:
+                yield vertex, labels[::-1]
+            continue
+        for below, label in vertex.edges.items():
+            now_used = used or (vertex, below) == required
+            if now_used or below.level >= floor:
+                stack.append((below, remaining - 1, labels + [label], now_used))
+
+def _post_order(root):
+    # Every node of the forest, children before parents, and whether the
+    # forest has a cycle
+    order = []
+    done = set()
+    active = set()
+    cyclic = False
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        key = id(node)
+        if expanded:
+            active.discard(key)
+            done.add(key)
+            order.append(node)
+            continue
+        if key in done:
+            continue
+        if key in active:
+            cyclic = True
+            continue
+        active.add(key)
+        stack.append((node, True))
+        for _, children in node.alternatives:
+            for child in children:
+                if id(child) in active:
+                    cyclic = True
+                elif id(child) not in done:
+                    stack.append((child, False))
+    return order, cyclic
+
+def count_trees(root):
+    """Return the number of parse trees in a forest, or ``float('inf')``
+    when it is cyclic."""
+    order, cyclic = _post_order(root)
+    if cyclic:
+        return float('inf')
+    counts = {}
+    for node in order:
+        if not node.alternatives:
+            counts[id(node)] = 1
+            continue
+        total = 0
+        for _, children in node.alternatives:
+            product = 1
+            for child in children:
+                product *= counts[id(child)]
+            total += product
+        counts[id(node)] = total
+    return counts[id(root)]
+
+def first_tree(root):
+    """Return one parse tree of a forest as parse_tree Nodes, with the
+    terminal symbols as leaves, choosing the shallowest derivation wherever
+    the forest is ambiguous."""
+    # Depth of the shallowest tree below every node, to a fixed point
+    nodes, _ = _post_order(root)
+    depth = {id(node): 0 for node in nodes if not node.alternatives}
+    best = {}
+    changed = True
+    while changed:
+        changed = False
+        for node in nodes:
+            for alternative in node.alternatives:
+                children = alternative[1]
+                if all(id(child) in depth for child in children):
+                    d = 1 + max((depth[id(child)] for child in children), default=0)
+                    if d < depth.get(id(node), float('inf')):
+                        depth[id(node)] = d
+                        best[id(node)] = alternative
+                        changed = True
+
+    # The chosen alternatives only lead to shallower nodes, so this ends
+    built = {}
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if not node.alternatives:
+            built[id(node)] = node.symbol
+        elif expanded:
+            production, children = best[id(node)]
+            built[id(node)] = Node(node.symbol, production,
+                                   tuple(built[id(child)] for child in children))
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in best[id(node)][1])
+    return built[id(root)]
@@ -4,21 +4,55 @@ class Grammar:
         self.terminals = set()
         self.nonterminals = set()
         self.start_symbol = 'S'  # Default start symbol
+    
+    @classmethod
+    def from_lines(cls, lines):
+        """Build a grammar from lines of the form
+        ``<nonterminal> -> <alternatives separated by spaces>``."""
+        grammar = cls()
+        for line in lines:
+            nonterminal, productions = line.strip().split(' -> ')
+            grammar.add_production(nonterminal, productions.split(' '))
+        return grammar
         
     def add_production(self, nonterminal, alternatives):
-        """Add a production rule to the grammar."""
+        """Add a production rule to the grammar.
+
+        Each alternative is either a string, where every character is a
+        symbol, or a sequence of symbols such as ``('if', 'E', 'then', 'S')``
+        for multi-character tokens. Symbols starting with an upper-case
+        letter are nonterminals.
+        """
         if nonterminal not in self.productions:
             self.productions[nonterminal] = []
             self.nonterminals.add(nonterminal)
         
         for alternative in alternatives:
+            if not isinstance(alternative, str):
+                alternative = tuple(alternative)
             self.productions[nonterminal].append(alternative)
             
             # Add terminals to the set
             for symbol in alternative:
-                if not symbol.isupper() and symbol != 'e':
+                if not symbol[:1].isupper() and symbol != 'e':
                     self.terminals.add(symbol)
     
+    def remove_production(self, nonterminal, alternative):
+        """Remove one alternative, given as in ``add_production``.
+
+        Raises ValueError if the nonterminal has no such alternative. The
+        nonterminal stays even when no alternatives are left, and terminals
+        no remaining production uses are dropped.
+        """
+        if not isinstance(alternative, str):
+            alternative = tuple(alternative)
+        if nonterminal not in self.productions:
+            raise ValueError(f"No productions for {nonterminal}")
+        self.productions[nonterminal].remove(alternative)
+
+        used = {symbol for prods in self.productions.values() for prod in prods for symbol in prod}
+        self.terminals = {t for t in self.terminals if t in used}
+
     def augment_grammar(self):
         """Create an augmented grammar by adding S' -> S."""
         augmented = Grammar()
@@ -39,6 +73,7 @@ class Grammar:
     def __str__(self):
         result = []
         for nt, prods in self.productions.items():
-            alternatives = " | ".join(prods)
+            alternatives = " | ".join(
+                prod if isinstance(prod, str) else " ".join(prod) or 'e' for prod in prods)
             result.append(f"{nt} -> {alternatives}")
         return "\n".join(result)
\ No newline at end of file
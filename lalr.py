@@ -0,0 +1,77 @@
+from first_follow import compute_nullable, propagate_sets
+from slr_parser import LR0Automaton, construct_lr_table
+
+def compute_lalr_lookaheads(grammar, lr0=None):
+    """Compute LALR(1) lookaheads with the DeRemer-Pennello relations.
+
+    Returns a dict mapping ``(state, (nonterminal, production))`` to the set
+    of lookahead terminals of each completed item of the LR(0) automaton.
+    ``lr0`` is the grammar's ``LR0Automaton`` if already built.
+    """
+    lr0 = lr0 if lr0 is not None else LR0Automaton(grammar)
+    states, transitions = lr0.states, lr0.transitions
+    nonterminals = grammar.nonterminals
+    nullable = compute_nullable(grammar)
+
+    # Nonterminal transitions (p, A) are the nodes of every relation below
+    nt_transitions = [key for key in transitions if key[1] in nonterminals]
+    outgoing = {}
+    for state, symbol in transitions:
+        outgoing.setdefault(state, []).append(symbol)
+
+    # DR(p, A): terminals shifted right after the transition; the end marker
+    # follows the start symbol in the state holding S' -> S .
+    direct_reads = {}
+    for p, A in nt_transitions:
+        r = transitions[(p, A)]
+        reads = {t for t in outgoing.get(r, ()) if t not in nonterminals}
+        if lr0.accept_item in states[r]:
+            reads.add('$')
+        direct_reads[(p, A)] = reads
+
+    # (p, A) reads (r, C) when C is nullable and follows A; Read(p, A)
+    # includes Read(r, C)
+    read_edges = {node: set() for node in nt_transitions}
+    for p, A in nt_transitions:
+        r = transitions[(p, A)]
+        for C in outgoing.get(r, ()):
+            if C in nullable:
+                read_edges[(r, C)].add((p, A))
+    read_sets, _ = propagate_sets(nt_transitions, direct_reads, read_edges)
+
+    # (p, A) includes (p', B) when B -> beta A gamma, gamma is nullable and
+    # beta leads from p' to p; a completed B -> omega in state q looks back
+    # to (p', B) when omega leads from p' to q
+    include_edges = {node: set() for node in nt_transitions}
+    lookback = {}
+    for p_start, B in nt_transitions:
+        for item in lr0.start_items.get(B, ()):
+            production = lr0.productions[lr0.item_production[item]][1]
+            state = p_start
+            for i, symbol in enumerate(production):
+                if symbol in nonterminals and all(s in nullable for s in production[i + 1:]):
+                    include_edges[(p_start, B)].add((state, symbol))
+                state = transitions.get((state, symbol))
+                if state is None:
+                    # A symbol the automaton never shifts; the item never completes
+                    break
+            else:
+                lookback.setdefault((state, (B, production)), []).append((p_start, B))
+    follow_sets, _ = propagate_sets(nt_transitions, read_sets, include_edges)
+
+    lookaheads = {}
+    for key, sources in lookback.items():
+        la = set()
+        for source in sources:
+            la |= follow_sets[source]
+        lookaheads[key] = la
+    return lookaheads
+
+def construct_lalr_table(grammar, lr0=None, conflicts=None):
+    """Construct LALR(1) action and goto tables in the same shape as
+    ``construct_slr_table``. ``conflicts`` works as in ``construct_lr_table``."""
+    lr0 = lr0 if lr0 is not None else LR0Automaton(grammar)
+    lookaheads = compute_lalr_lookaheads(grammar, lr0)
+    productions = lr0.productions
+    return construct_lr_table(
+        grammar, lr0, lambda i, p: lookaheads.get((i, productions[p]), ()), conflicts)
@@ -0,0 +1,292 @@
+from array import array
+
+from tables import END
+
+class LexError(ValueError):
+    """Raised when no token definition matches the input at ``position``."""
+    def __init__(self, position):
+        super().__init__(f"No token matches the input at position {position}")
+        self.position = position
+
+# Character sets are (chars, negated) pairs; a negated set matches every
+# character not in chars
+_ESCAPES = {
+    'd': (frozenset('0123456789'), False),
+    'w': (frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'), False),
+    's': (frozenset(' \t\n\r\f\v'), False),
+    'n': (frozenset('\n'), False),
+    't': (frozenset('\t'), False),
+}
+_ANY = (frozenset('\n'), True)
+
+class _NFA:
+    """Thompson NFA shared by all token patterns."""
+    def __init__(self):
+        self.epsilon = []  # state -> states reachable by an empty move
+        self.edges = []    # state -> [(charset, state)]
+
+    def new_state(self):
+        self.epsilon.append([])
+        self.edges.append([])
+        return len(self.epsilon) - 1
+
+class _PatternParser:
+    """Recursive-descent parser turning one pattern into an NFA fragment.
+
+    Supports literals, ``.``, ``[...]`` classes with ranges and ``^``,
+    ``\\d \\w \\s`` escapes, grouping, ``|``, ``*``, ``+`` and ``?``.
+    """
+    def __init__(self, nfa, pattern):
+        self.nfa = nfa
+        self.pattern = pattern
+        self.pos = 0
+
+    def parse(self):
+        fragment = self._alternation()
+        if self.pos != len(self.pattern):
+            raise ValueError(f"Unexpected '{self.pattern[self.pos]}' in pattern {self.pattern!r}")
+        return fragment
+
+    def _peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else None
+
+    def _alternation(self):
+        fragments = [self._concatenation()]
+        while self._peek() == '|':
+            self.pos += 1
+            fragments.append(self._concatenation())
+        if len(fragments) == 1:
+            return fragments[0]
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        for frag_start, frag_end in fragments:
+            self.nfa.epsilon[start].append(frag_start)
+            self.nfa.epsilon[frag_end].append(end)
+        return start, end
+
+    def _concatenation(self):
+        start = end = self.nfa.new_state()
+        while self._peek() not in (None, '|', ')'):
+            frag_start, frag_end = self._repetition()
+            self.nfa.epsilon[end].append(frag_start)
+            end = frag_end
+        return start, end
+
+    def _repetition(self):
+        frag_start, frag_end = self._atom()
+        while self._peek() in ('*', '+', '?'):
+            op = self.pattern[self.pos]
+            self.pos += 1
+            start, end = self.nfa.new_state(), self.nfa.new_state()
+            self.nfa.epsilon[start].append(frag_start)
+            self.nfa.epsilon[frag_end].append(end)
+            if op in '*?':
+                self.nfa.epsilon[start].append(end)
+            if op in '*+':
+                self.nfa.epsilon[frag_end].append(frag_start)
+            frag_start, frag_end = start, end
+        return frag_start, frag_end
+
+    def _atom(self):
+        char = self._peek()
+        if char is None:
+            raise ValueError(f"Unexpected end of pattern {self.pattern!r}")
+        self.pos += 1
+        if char == '(':
+            fragment = self._alternation()
+            if self._peek() != ')':
+                raise ValueError(f"Missing ')' in pattern {self.pattern!r}")
+            self.pos += 1
+            return fragment
+        if char == '[':
+            charset = self._char_class()
+        elif char == '.':
+            charset = _ANY
+        elif char == '\\':
+            charset = self._escape()
+        elif char in '*+?)':
+            raise ValueError(f"Unexpected '{char}' in pattern {self.pattern!r}")
+        else:
+            charset = (frozenset(char), False)
+        start, end = self.nfa.new_state(), self.nfa.new_state()
+        self.nfa.edges[start].append((charset, end))
+        return start, end
+
+    def _escape(self):
+        char = self._peek()
+        if char is None:
+            raise ValueError(f"Dangling '\\' in pattern {self.pattern!r}")
+        self.pos += 1
+        return _ESCAPES.get(char, (frozenset(char), False))
+
+    def _char_class(self):
+        negated = self._peek() == '^'
+        if negated:
+            self.pos += 1
+        chars = set()
+        first = True
+        while True:
+            char = self._peek()
+            if char is None:
+                raise ValueError(f"Missing ']' in pattern {self.pattern!r}")
+            if char == ']' and not first:
+                self.pos += 1
+                break
+            first = False
+            self.pos += 1
+            if char == '\\':
+                escaped, _ = self._escape()
+                chars |= escaped
+                continue
+            if (self._peek() == '-' and self.pos + 1 < len(self.pattern)
+                    and self.pattern[self.pos + 1] != ']'):
+                high = self.pattern[self.pos + 1]
+                self.pos += 2
+                chars.update(chr(c) for c in range(ord(char), ord(high) + 1))
+            else:
+                chars.add(char)
+        return frozenset(chars), negated
+
+class Lexer:
+    """Longest-match scanner compiled from token definitions into one DFA.
+
+    ``tokens`` is a sequence of ``(name, pattern)`` pairs; when several
+    tokens match the same longest text, the one defined first wins. Tokens
+    named in ``skip`` (whitespace, comments) are matched but not produced.
+    Token names are meant to be the terminals of a grammar, so they should
+    not start with an upper-case letter.
+    """
+    def __init__(self, tokens, skip=()):
+        self.names = [name for name, _ in tokens]
+        self.skip = frozenset(skip)
+        self._compile([pattern for _, pattern in tokens])
+        # id(table) -> (table, token index -> terminal ID)
+        self._bindings = {}
+
+    def _compile(self, patterns):
+        nfa = _NFA()
+        start = nfa.new_state()
+        accepting = {}
+        for index, pattern in enumerate(patterns):
+            frag_start, frag_end = _PatternParser(nfa, pattern).parse()
+            nfa.epsilon[start].append(frag_start)
+            accepting[frag_end] = index
+
+        # Every character mentioned in a pattern gets its own input class;
+        # class 0 stands for all other characters
+        alphabet = sorted({char for edges in nfa.edges for (chars, _), _ in edges for char in chars})
+        self.classes = {char: k + 1 for k, char in enumerate(alphabet)}
+        num_classes = len(alphabet) + 1
+
+        def closure(states):
+            result = set(states)
+            work = list(states)
+            while work:
+                for target in nfa.epsilon[work.pop()]:
+                    if target not in result:
+                        result.add(target)
+                        work.append(target)
+            return frozenset(result)
+
+        def move(states, char):
+            targets = set()
+            for state in states:
+                for (chars, negated), target in nfa.edges[state]:
+                    if char is None:
+                        matches = negated
+                    else:
+                        matches = (char in chars) != negated
+                    if matches:
+                        targets.add(target)
+            return targets
+
+        # Subset construction; char None is the class of all other characters
+        initial = closure([start])
+        state_ids = {initial: 0}
+        dfa_states = [initial]
+        delta = array('i')
+        accept = array('i')
+        i = 0
+        while i < len(dfa_states):
+            states = dfa_states[i]
+            matched = [accepting[s] for s in states if s in accepting]
+            accept.append(min(matched) if matched else -1)
+            for char in [None] + alphabet:
+                targets = move(states, char)
+                if not targets:
+                    delta.append(-1)
+                    continue
+                target = closure(targets)
+                if target not in state_ids:
+                    state_ids[target] = len(dfa_states)
+                    dfa_states.append(target)
+                delta.append(state_ids[target])
+            i += 1
+
+        if accept[0] >= 0:
+            raise ValueError(f"Token {self.names[accept[0]]!r} matches the empty string")
+        self.num_classes = num_classes
+        self.delta = delta
+        self.accept = accept
+
+    def _scan(self, text):
+        """Yield ``(token index, start, end)`` for each token of ``text``,
+        with token index -1 where nothing matches."""
+        classes = self.classes
+        delta = self.delta
+        accept = self.accept
+        num_classes = self.num_classes
+        n = len(text)
+        pos = 0
+        while pos < n:
+            state = 0
+            token = -1
+            end = i = pos
+            while i < n:
+                state = delta[state * num_classes + classes.get(text[i], 0)]
+                if state < 0:
+                    break
+                i += 1
+                if accept[state] >= 0:
+                    token = accept[state]
+                    end = i
+            if token < 0:
+                yield -1, pos, pos
+                return
+            yield token, pos, end
+            pos = end
+
+    def tokenize(self, text):
+        """Yield ``(name, lexeme)`` for each token of ``text``; raises
+        LexError where no token matches."""
+        names = self.names
+        skip = self.skip
+        for token, start, end in self._scan(text):
+            if token < 0:
+                raise LexError(start)
+            if names[token] not in skip:
+                yield names[token], text[start:end]
+
+    def token_ids(self, text, table):
+        """Yield the terminal IDs of ``table`` (a compiled LL(1) or SLR(1)
+        table) for the tokens of ``text``, followed by the end marker, ready
+        for ``ll_parse_ids``/``slr_parse_ids``.
+
+        Tokens the grammar does not use, and text no token matches, become
+        the table's unknown-symbol ID, so the parser rejects them.
+        """
+        binding = self._bindings.get(id(table))
+        if binding is None or binding[0] is not table:
+            unknown = table.num_terminals
+            ids = [-1 if name in self.skip else table.terminal_ids.get(name, unknown)
+                   for name in self.names]
+            binding = self._bindings[id(table)] = (table, ids)
+        ids = binding[1]
+
+        for token, _, _ in self._scan(text):
+            if token < 0:
+                yield table.num_terminals
+                return
+            terminal = ids[token]
+            if terminal >= 0:
+                yield terminal
+        yield END
@@ -1,15 +1,32 @@
+import time
+
+from diagnostics import Conflict, record_error
 from first_follow import compute_first_of_string
+from tables import END
+
+def construct_ll_table(grammar, first, follow, conflicts=None, nonterminals=None):
+    """Construct the LL(1) parsing table for the grammar.
 
-def construct_ll_table(grammar, first, follow):
-    """Construct the LL(1) parsing table for the grammar."""
+    Returns None on the first conflict, unless ``conflicts`` is a list: then
+    the table is completed, each conflicting cell keeps the earliest
+    production and is appended to ``conflicts`` as a Conflict. With
+    ``nonterminals``, only their rows are built.
+    """
     table = {}
+    if nonterminals is None:
+        nonterminals = grammar.nonterminals
     
     # Initialize the table with empty dictionaries
-    for nonterminal in grammar.nonterminals:
+    for nonterminal in nonterminals:
         table[nonterminal] = {}
     
+    # (nonterminal, terminal) -> competing productions, and whether any of
+    # them was entered through FOLLOW
+    cells = {}
+    from_follow = set()
+    
     # Fill in the table
-    for nonterminal in grammar.nonterminals:
+    for nonterminal in nonterminals:
         for i, production in enumerate(grammar.productions[nonterminal]):
             # Compute FIRST of the production
             first_of_production = compute_first_of_string(first, production)
@@ -18,7 +35,10 @@ def construct_ll_table(grammar, first, follow):
             for terminal in first_of_production - {'e'}:
                 if terminal in table[nonterminal]:
                     # Conflict detected
-                    return None
+                    if conflicts is None:
+                        return None
+                    cells.setdefault((nonterminal, terminal), [table[nonterminal][terminal]]).append(production)
+                    continue
                 table[nonterminal][terminal] = production
             
             # If e is in FIRST(production), add the production to the table for each terminal in FOLLOW(nonterminal)
@@ -26,17 +46,39 @@ def construct_ll_table(grammar, first, follow):
                 for terminal in follow[nonterminal]:
                     if terminal in table[nonterminal]:
                         # Conflict detected
-                        return None
+                        if conflicts is None:
+                            return None
+                        cells.setdefault((nonterminal, terminal), [table[nonterminal][terminal]]).append(production)
+                        from_follow.add((nonterminal, terminal))
+                        continue
                     table[nonterminal][terminal] = production
+                    from_follow.add((nonterminal, terminal))
+    
+    for (nonterminal, terminal), choices in cells.items():
+        kind = 'first/follow' if (nonterminal, terminal) in from_follow else 'first/first'
+        conflicts.append(Conflict(kind, terminal, choices, nonterminal=nonterminal))
     
     return table
 
-def ll_parse(grammar, table, input_string):
-    """Parse the input string using the LL(1) parsing table."""
+def ll_parse(grammar, table, input_string, semantics=None, profile=None):
+    """Parse the input string using the LL(1) parsing table.
+
+    If ``semantics`` is given (see ``parse_tree``), it is told about every
+    matched terminal and completed production, in postfix order. If
+    ``profile`` is a ``ParseProfile``, the parse is counted in it instead.
+    """
     # Add end marker to input
     if input_string[-1] != '$':
         input_string += '$'
     
+    if profile is not None:
+        if semantics is not None:
+            raise ValueError("semantics and profile cannot be combined")
+        return _ll_parse_profiled(grammar, table, input_string, profile)
+    
+    if semantics is not None:
+        return _ll_parse_semantic(grammar, table, input_string, semantics)
+    
     # Initialize the stack with the start symbol and end marker
     stack = ['$', grammar.start_symbol]
     
@@ -69,4 +111,356 @@ def ll_parse(grammar, table, input_string):
             else:
                 return False
     
-    return i == len(input_string)
\ No newline at end of file
+    return i == len(input_string)
+
+def _ll_parse_semantic(grammar, table, input_string, semantics):
+    # Like ll_parse, but each expansion also pushes a (nonterminal,
+    # production) marker below its symbols; popping the marker means the
+    # production is complete and its values are on top of the value stack
+    stack = ['$', grammar.start_symbol]
+    values = []
+    i = 0
+    
+    while stack:
+        top = stack.pop()
+        
+        if type(top) is tuple:
+            nt, production = top
+            n = len(production)
+            children = values[len(values) - n:]
+            del values[len(values) - n:]
+            values.append(semantics.reduce(nt, production, children))
+            continue
+        
+        if top == '$' and i == len(input_string):
+            semantics.accept(values[-1] if values else None)
+            return True
+        
+        if top not in grammar.nonterminals:
+            if i < len(input_string) and top == input_string[i]:
+                if top != '$':
+                    values.append(semantics.shift(top, i))
+                i += 1
+            else:
+                return False
+        else:
+            if i < len(input_string) and input_string[i] in table[top]:
+                production = table[top][input_string[i]]
+                if production == 'e':
+                    production = ()
+                stack.append((top, production))
+                for symbol in reversed(production):
+                    stack.append(symbol)
+            else:
+                return False
+    
+    if i == len(input_string):
+        semantics.accept(values[-1] if values else None)
+        return True
+    return False
+
+def _ll_parse_profiled(grammar, table, input_string, profile):
+    # Like ll_parse, counting every table cell, expansion and match
+    cells = profile.cells
+    shifts = profile.shifts
+    reductions = profile.reductions
+    started = time.perf_counter()
+    
+    stack = ['$', grammar.start_symbol]
+    depth = len(stack)
+    i = 0
+    result = False
+    
+    while stack:
+        top = stack.pop()
+        
+        if top == '$' and i == len(input_string):
+            result = True
+            break
+        
+        if top not in grammar.nonterminals:
+            if i < len(input_string) and top == input_string[i]:
+                if top != '$':
+                    shifts[top] = shifts.get(top, 0) + 1
+                i += 1
+            else:
+                break
+        else:
+            symbol = input_string[i] if i < len(input_string) else None
+            if symbol in table[top]:
+                production = table[top][symbol]
+                cells[(top, symbol)] = cells.get((top, symbol), 0) + 1
+                key = (top, () if production == 'e' else production)
+                reductions[key] = reductions.get(key, 0) + 1
+                if production != 'e':
+                    stack.extend(reversed(production))
+                    depth = max(depth, len(stack))
+            else:
+                break
+    else:
+        result = i == len(input_string)
+    
+    profile.record(started, result, depth)
+    return result
+
+def ll_parse_errors(grammar, table, follow, input_string):
+    """Parse the input string with panic-mode error recovery and return
+    every error found, as a list of ParseErrors in input order; the input
+    is accepted when the list is empty.
+
+    A nonterminal with no table entry for the current symbol skips input
+    until a symbol it can expand on, where parsing resumes, or one in its
+    FOLLOW set, where it is taken as derived. A terminal that does not
+    match is taken as missing.
+    """
+    symbols = list(input_string)
+    if not symbols or symbols[-1] != '$':
+        symbols.append('$')
+    nonterminals = grammar.nonterminals
+
+    errors = []
+    stack = ['$', grammar.start_symbol]
+    i = 0
+
+    while stack:
+        top = stack.pop()
+        symbol = symbols[i]
+
+        if top not in nonterminals:
+            if top == symbol:
+                if top == '$':
+                    break
+                i += 1
+            elif top == '$':
+                # Input left over after a complete parse
+                record_error(errors, i, symbol, ('$',))
+                break
+            else:
+                record_error(errors, i, symbol, (top,))
+            continue
+
+        row = table[top]
+        production = row.get(symbol)
+        if production is not None:
+            if production != 'e':
+                stack.extend(reversed(production))
+            continue
+
+        record_error(errors, i, symbol, row)
+        # Synchronize; the end marker is never skipped
+        sync = follow[top]
+        while symbol not in row and symbol not in sync and symbol != '$':
+            i += 1
+            symbol = symbols[i]
+        if symbol in row:
+            stack.append(top)
+
+    return errors
+
+def ll_parse_compiled(table, input_string, semantics=None, profile=None):
+    """Parse the input string using a CompiledLLTable."""
+    return ll_parse_ids(table, table.encode(input_string), semantics, profile)
+
+def ll_parse_ids(table, tokens, semantics=None, profile=None):
+    """Parse terminal IDs, ending with the end marker, using a
+    CompiledLLTable. ``tokens`` can be any iterable, such as a lexer.
+    ``semantics`` and ``profile`` work as in ``ll_parse``."""
+    if profile is not None:
+        if semantics is not None:
+            raise ValueError("semantics and profile cannot be combined")
+        return _ll_parse_ids_profiled(table, tokens, profile)
+    
+    if semantics is not None:
+        return _ll_parse_ids_semantic(table, tokens, semantics)
+    
+    rows = table.table
+    push = table.push
+    width = table.width
+    num_terminals = table.num_terminals
+    
+    stack = [END, table.start]
+    # Current input symbol, or None once the input is exhausted
+    tokens = iter(tokens)
+    symbol = next(tokens, None)
+    
+    while stack:
+        top = stack.pop()
+        
+        if top < num_terminals:
+            # Terminal: match it with the current input symbol
+            if symbol is not None and symbol == top:
+                symbol = next(tokens, None)
+            elif top == END and symbol is None:
+                return True
+            else:
+                return False
+        else:
+            # Nonterminal: expand by the production in the table
+            if symbol is None:
+                return False
+            production = rows[(top - num_terminals) * width + symbol]
+            if production < 0:
+                return False
+            stack.extend(push[production])
+    
+    return symbol is None
+
+def _ll_parse_ids_semantic(table, tokens, semantics):
+    # Production p is completed when the marker -(p + 1) is popped
+    rows = table.table
+    push = table.push
+    productions = table.productions
+    names = table.terminal_names
+    width = table.width
+    num_terminals = table.num_terminals
+    
+    stack = [END, table.start]
+    values = []
+    tokens = iter(tokens)
+    symbol = next(tokens, None)
+    position = 0
+    
+    while stack:
+        top = stack.pop()
+        
+        if top < 0:
+            production = -top - 1
+            n = len(push[production])
+            children = values[len(values) - n:]
+            del values[len(values) - n:]
+            nt, body = productions[production]
+            values.append(semantics.reduce(nt, () if body == 'e' else body, children))
+        elif top < num_terminals:
+            if symbol is not None and symbol == top:
+                if top != END:
+                    values.append(semantics.shift(names[top], position))
+                symbol = next(tokens, None)
+                position += 1
+            elif top == END and symbol is None:
+                break
+            else:
+                return False
+        else:
+            if symbol is None:
+                return False
+            production = rows[(top - num_terminals) * width + symbol]
+            if production < 0:
+                return False
+            stack.append(-production - 1)
+            stack.extend(push[production])
+    
+    if symbol is not None:
+        return False
+    semantics.accept(values[-1] if values else None)
+    return True
+
+def _ll_parse_ids_profiled(table, tokens, profile):
+    # Like ll_parse_ids, with the counters of ll_parse's profile
+    rows = table.table
+    push = table.push
+    productions = table.productions
+    names = table.terminal_names
+    width = table.width
+    num_terminals = table.num_terminals
+    cells = profile.cells
+    shifts = profile.shifts
+    reductions = profile.reductions
+    started = time.perf_counter()
+    
+    stack = [END, table.start]
+    depth = len(stack)
+    tokens = iter(tokens)
+    symbol = next(tokens, None)
+    result = False
+    
+    while stack:
+        top = stack.pop()
+        
+        if top < num_terminals:
+            if symbol is not None and symbol == top:
+                if top != END:
+                    name = names[top]
+                    shifts[name] = shifts.get(name, 0) + 1
+                symbol = next(tokens, None)
+            elif top == END and symbol is None:
+                result = True
+                break
+            else:
+                break
+        else:
+            if symbol is None:
+                break
+            production = rows[(top - num_terminals) * width + symbol]
+            if production < 0:
+                break
+            nt, body = productions[production]
+            cell = (nt, names[symbol])
+            cells[cell] = cells.get(cell, 0) + 1
+            key = (nt, () if body == 'e' else body)
+            reductions[key] = reductions.get(key, 0) + 1
+            stack.extend(push[production])
+            depth = max(depth, len(stack))
+    else:
+        result = symbol is None
+    
+    profile.record(started, result, depth)
+    return result
+
+class LLStreamParser:
+    """Incremental LL(1) parser that is fed its input a piece at a time.
+
+    Only the parse stack is kept, so memory does not grow with the input.
+    ``feed`` returns True or False as soon as the input is accepted or
+    rejected and None while undecided; ``position`` counts the symbols
+    consumed, so after a rejection it is the index of the offending symbol.
+    Input after the end marker is ignored.
+    """
+    def __init__(self, grammar, table):
+        self.nonterminals = grammar.nonterminals
+        self.table = table
+        self.stack = ['$', grammar.start_symbol]
+        self.position = 0
+        self.result = None
+    
+    def feed(self, symbols):
+        """Consume a chunk (a string or any iterable of symbols)."""
+        if self.result is not None:
+            return self.result
+        
+        stack = self.stack
+        table = self.table
+        nonterminals = self.nonterminals
+        
+        for symbol in symbols:
+            # Expand nonterminals until a terminal is on top, then match it
+            while True:
+                top = stack.pop()
+                if top not in nonterminals:
+                    if top != symbol:
+                        self.result = False
+                        return False
+                    break
+                production = table[top].get(symbol)
+                if production is None:
+                    self.result = False
+                    return False
+                if production != 'e':
+                    stack.extend(reversed(production))
+            
+            self.position += 1
+            if symbol == '$':
+                self.result = True
+                return True
+        
+        return None
+    
+    def finish(self):
+        """Signal the end of the input and return whether it was accepted."""
+        return bool(self.feed('$'))
+    
+    def parse_chunks(self, chunks):
+        """Feed chunks until the input is decided; later chunks are not read."""
+        for chunk in chunks:
+            if self.feed(chunk) is not None:
+                return self.result
+        return self.finish()
@@ -1,38 +1,186 @@
+import argparse
+import json
+import os
+import sys
+from itertools import islice
+
+from analysis import GrammarAnalysis
+from batch import parse_many, read_inputs
+from codegen import write_module
+from diagnostics import ParseProfile
+from glr import glr_parse
 from grammar import Grammar
-from first_follow import compute_first, compute_follow
-from ll_parser import construct_ll_table, ll_parse
-from slr_parser import construct_slr_table, slr_parse, check_slr1
+from first_follow import SolverStats
+from optimize import optimize
+from ll_parser import ll_parse_compiled, ll_parse_errors
+from slr_parser import slr_parse_compiled, slr_parse_errors
 
 def parse_grammar():
     """Parse the grammar from standard input."""
     n = int(input())
-    grammar = Grammar()
+    return Grammar.from_lines(input() for _ in range(n))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="LL(1) and SLR(1) parser generator.")
+    parser.add_argument('--stats', action='store_true',
+                        help="write FIRST/FOLLOW timings and set sizes to stderr as JSON")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="parse every line of FILE ('-' for the rest of stdin) and print yes/no per line")
+    parser.add_argument('--parser', choices=['ll', 'slr', 'lalr'],
+                        help="parser to use with --batch or --emit (default: LL(1) if possible, else SLR(1), "
+                             "else LALR(1) with --lalr)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for --batch (default: one per CPU)")
+    parser.add_argument('--cache-dir', default=os.environ.get('GRAMMAR_CACHE_DIR'),
+                        help="reuse analysis results stored in this directory "
+                             "(default: $GRAMMAR_CACHE_DIR; no caching if unset)")
+    parser.add_argument('--conflicts', action='store_true',
+                        help="list every LL(1) and SLR(1) table conflict on stderr")
+    parser.add_argument('--lalr', action='store_true',
+                        help="fall back to an LALR(1) parser when the grammar is neither LL(1) nor SLR(1)")
+    parser.add_argument('--emit', metavar='FILE',
+                        help="write a standalone Python parser module for the grammar to FILE and exit")
+    parser.add_argument('--errors', action='store_true',
+                        help="list every syntax error of each rejected string on stderr")
+    parser.add_argument('--no-glr', action='store_true',
+                        help="stop instead of falling back to a GLR parser when the grammar is neither "
+                             "LL(1) nor SLR(1)")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="count state visits, shifts, reductions, stack depth and per-string time "
+                             "of the LL(1)/SLR(1) parses and write them to FILE as JSON")
+    parser.add_argument('--optimize', action='store_true',
+                        help="remove useless symbols, left recursion and common prefixes before the analysis")
+    return parser.parse_args(argv)
+
+def report_errors(analysis, parser, input_string):
+    """Print every syntax error of a rejected string to stderr, found in
+    one pass with error recovery."""
+    grammar = analysis.grammar
+    if parser == 'll':
+        errors = ll_parse_errors(grammar, analysis.ll_table, analysis.follow, input_string)
+    else:
+        action, goto = analysis.slr_table if parser == 'slr' else analysis.lalr_table
+        errors = slr_parse_errors(grammar, action, goto, input_string)
+    for error in errors:
+        print(error, file=sys.stderr)
+
+def select_table(args, analysis):
+    """Return the compiled table chosen with --parser, and its name; the
+    table is None if the grammar does not support that parser."""
+    parser = args.parser
+    if parser is None:
+        if analysis.is_ll1:
+            parser = 'll'
+        elif analysis.is_slr1 or not args.lalr:
+            parser = 'slr'
+        else:
+            parser = 'lalr'
+    
+    if parser == 'll':
+        return analysis.ll_compiled, "LL(1)"
+    elif parser == 'slr':
+        return analysis.slr_compiled, "SLR(1)"
+    else:
+        return analysis.lalr_compiled, "LALR(1)"
+
+def run_batch(args, analysis, profile=None):
+    """Parse the inputs of --batch with the selected table, or check them
+    against the grammar's DFA when it is regular and no parser was chosen.
+    A grammar that is neither, nor LL(1) or SLR(1), is parsed with the GLR
+    parser. With a profile, the table is used and every string is parsed
+    in this process."""
+    if args.parser is None and analysis.dfa is not None and profile is None:
+        # Regular grammars use the DFA even when they are not deterministic
+        run_dfa_batch(args, analysis.dfa)
+        return
     
-    for _ in range(n):
-        line = input().strip()
-        nonterminal, productions = line.split(' -> ')
-        alternatives = productions.split(' ')
-        grammar.add_production(nonterminal, alternatives)
+    if not analysis.is_ll1 and not analysis.is_slr1 and not (args.lalr and analysis.is_lalr1):
+        if args.no_glr:
+            print("Grammar is neither LL(1) nor SLR(1).")
+        else:
+            run_glr_batch(args, analysis)
+        return
     
-    return grammar
+    table, name = select_table(args, analysis)
+    if table is None:
+        print(f"Grammar is not {name}.")
+        return
+    
+    source = sys.stdin if args.batch == '-' else open(args.batch)
+    with source:
+        if profile is not None:
+            parse = ll_parse_compiled if name == "LL(1)" else slr_parse_compiled
+            results = (parse(table, input_string, profile=profile) for input_string in read_inputs(source))
+        else:
+            results = parse_many(table, read_inputs(source), workers=args.workers)
+        for result in results:
+            sys.stdout.write("yes\n" if result else "no\n")
+
+def write_profile(args, profile):
+    """Write the counters of --profile to its file."""
+    if profile is not None:
+        with open(args.profile, 'w') as f:
+            json.dump(profile.as_dict(), f, indent=1)
 
-def main():
+def run_dfa_batch(args, dfa, chunksize=65536):
+    """Check the inputs of --batch against a DFA, a chunk at a time."""
+    source = sys.stdin if args.batch == '-' else open(args.batch)
+    with source:
+        inputs = read_inputs(source)
+        while True:
+            chunk = list(islice(inputs, chunksize))
+            if not chunk:
+                break
+            sys.stdout.write("".join("yes\n" if result else "no\n" for result in dfa.accepts_many(chunk)))
+
+def run_glr_batch(args, analysis):
+    """Parse the inputs of --batch with the GLR parser, in this process."""
+    action, goto = analysis.glr_table
+    source = sys.stdin if args.batch == '-' else open(args.batch)
+    with source:
+        for input_string in read_inputs(source):
+            sys.stdout.write("yes\n" if glr_parse(action, goto, input_string) else "no\n")
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     # Parse the grammar
     grammar = parse_grammar()
+    if args.optimize:
+        grammar = optimize(grammar).grammar
     
-    # Compute FIRST and FOLLOW sets
-    first = compute_first(grammar)
-    follow = compute_follow(grammar, first)
+    # Reuse a cached analysis of the same grammar when there is one
+    analysis = GrammarAnalysis.from_cache(args.cache_dir, grammar) if args.cache_dir else None
+    if analysis is None:
+        stats = SolverStats() if args.stats else None
+        analysis = GrammarAnalysis(grammar, stats)
+        if args.cache_dir:
+            analysis.save(args.cache_dir)
     
-    # Construct the LL(1) parsing table
-    ll_table = construct_ll_table(grammar, first, follow)
+    # Determine which parsers apply
+    is_ll1 = analysis.is_ll1
+    is_slr1 = analysis.is_slr1
+    if analysis.stats is not None:
+        print(json.dumps(analysis.stats.as_dict()), file=sys.stderr)
+    if args.conflicts:
+        for name, conflicts in (("LL(1)", analysis.ll_conflicts), ("SLR(1)", analysis.slr_conflicts)):
+            for conflict in conflicts:
+                print(f"{name}: {conflict}", file=sys.stderr)
     
-    # Check if the grammar is SLR(1)
-    is_ll1 = ll_table is not None
-    is_slr1 = check_slr1(grammar, first, follow)
+    if args.emit is not None:
+        table, name = select_table(args, analysis)
+        if table is None:
+            print(f"Grammar is not {name}.")
+        else:
+            write_module(table, args.emit)
+        return
     
-    # Construct the SLR(1) parsing tables
-    slr_action, slr_goto = construct_slr_table(grammar, first, follow)
+    profile = ParseProfile() if args.profile else None
+    
+    if args.batch is not None:
+        run_batch(args, analysis, profile)
+        write_profile(args, profile)
+        return
     
     # Determine the type of grammar
     if is_ll1 and is_slr1:
@@ -50,8 +198,10 @@ def main():
                     if not input_string:
                         break
                     
-                    result = ll_parse(grammar, ll_table, input_string)
+                    result = ll_parse_compiled(analysis.ll_compiled, input_string, profile=profile)
                     print("yes" if result else "no")
+                    if not result and args.errors:
+                        report_errors(analysis, 'll', input_string)
                 
                 print("Select a parser (T: for LL(1), B: for SLR(1), Q: quit):")
             
@@ -62,8 +212,10 @@ def main():
                     if not input_string:
                         break
                     
-                    result = slr_parse(grammar, slr_action, slr_goto, input_string)
+                    result = slr_parse_compiled(analysis.slr_compiled, input_string, profile=profile)
                     print("yes" if result else "no")
+                    if not result and args.errors:
+                        report_errors(analysis, 'slr', input_string)
                 
                 print("Select a parser (T: for LL(1), B: for SLR(1), Q: quit):")
     
@@ -74,8 +226,10 @@ def main():
             if not input_string:
                 break
             
-            result = ll_parse(grammar, ll_table, input_string)
+            result = ll_parse_compiled(analysis.ll_compiled, input_string, profile=profile)
             print("yes" if result else "no")
+            if not result and args.errors:
+                report_errors(analysis, 'll', input_string)
     
     elif is_slr1:
         print("Grammar is SLR(1).")
@@ -84,11 +238,40 @@ def main():
             if not input_string:
                 break
             
-            result = slr_parse(grammar, slr_action, slr_goto, input_string)
+            result = slr_parse_compiled(analysis.slr_compiled, input_string, profile=profile)
+            print("yes" if result else "no")
+            if not result and args.errors:
+                report_errors(analysis, 'slr', input_string)
+    
+    elif args.lalr and analysis.is_lalr1:
+        print("Grammar is LALR(1).")
+        while True:
+            input_string = input().strip()
+            if not input_string:
+                break
+            
+            result = slr_parse_compiled(analysis.lalr_compiled, input_string, profile=profile)
             print("yes" if result else "no")
+            if not result and args.errors:
+                report_errors(analysis, 'lalr', input_string)
     
     else:
         print("Grammar is neither LL(1) nor SLR(1).")
+        if args.no_glr:
+            return
+        # Fall back to the GLR parser, which follows every conflicting action
+        action, goto = analysis.glr_table
+        while True:
+            try:
+                input_string = input().strip()
+            except EOFError:
+                break
+            if not input_string:
+                break
+            
+            print("yes" if glr_parse(action, goto, input_string) else "no")
+    
+    write_profile(args, profile)
 
 if __name__ == "__main__":
     main()
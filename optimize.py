@@ -0,0 +1,333 @@
+from first_follow import _strongly_connected_components
+from grammar import Grammar
+
+# Transformations work on {nonterminal: [(body, origins)]}, where body is a
+# tuple of symbols (() for the empty production) and origins is the tuple of
+# original (nonterminal, production) pairs the production was derived from
+
+class OptimizedGrammar:
+    """The result of ``optimize``.
+
+    ``grammar`` is the transformed grammar, with every production a tuple
+    of symbols and the empty production written 'e'. New nonterminals are
+    named after the one they split off from, as in ``T'`` or ``S''``; the
+    start symbol followed by one ``'`` is never used, since the LR(0)
+    automaton gives that name to its augmented start symbol. ``origins``
+    maps each of its ``(nonterminal, production)`` pairs to the original
+    pairs, as written in the input grammar, that it was derived from;
+    productions introduced by a transformation, such as ``A' -> e``, map to
+    ``()``.
+    ``removed`` holds the nonterminals of the input that were dropped as
+    useless.
+    """
+    def __init__(self, grammar, origins, removed):
+        self.grammar = grammar
+        self.origins = origins
+        self.removed = removed
+
+    def origin(self, nonterminal, production):
+        """Return the original productions behind one production of the
+        transformed grammar."""
+        return self.origins[(nonterminal, production)]
+
+def optimize(grammar, remove_useless=True, left_recursion=True, left_factor=True):
+    """Transform ``grammar`` into an equivalent grammar that is more often
+    LL(1) and smaller to analyze, returning an OptimizedGrammar.
+
+    The steps run in order: removing nonterminals that derive no terminal
+    string or are unreachable from the start symbol, eliminating direct and
+    indirect left recursion, and left-factoring common prefixes. Left
+    recursion, including recursion through a nullable prefix as in
+    ``A -> B A x`` with B nullable, is removed completely; when there is
+    any, the empty productions are removed first and nonterminals that
+    derive each other through unit productions (A -> B, B -> A) are merged,
+    as the elimination requires, so the start symbol is then the only
+    nonterminal of the input that can still derive the empty string.
+    """
+    # The LR(0) automaton names its augmented start symbol after the start
+    # symbol (E' for E), so that name must stay free
+    nonterminals = set(grammar.nonterminals) | {grammar.start_symbol + "'"}
+    rules = {}
+    for nt, productions in grammar.productions.items():
+        rules[nt] = _dedupe([(_body(p), ((nt, p),)) for p in productions])
+
+    removed = set()
+    if remove_useless:
+        removed = _remove_useless(rules, nonterminals, grammar.start_symbol)
+    if left_recursion and _left_recursive(_bodies(rules)):
+        _eliminate_epsilon(rules, nonterminals, grammar.start_symbol)
+        # Nonterminals that only derived the empty string are now useless
+        removed |= _remove_useless(rules, nonterminals, grammar.start_symbol)
+        _merge_unit_cycles(rules, grammar.start_symbol)
+        _eliminate_left_recursion(rules, nonterminals)
+    if left_factor:
+        _left_factor(rules, nonterminals)
+
+    result = Grammar()
+    result.start_symbol = grammar.start_symbol
+    origins = {}
+    for nt, productions in rules.items():
+        result.productions[nt] = []
+        result.nonterminals.add(nt)
+        for body, sources in productions:
+            production = body if body else 'e'
+            result.add_production(nt, [production])
+            origins[(nt, production)] = sources
+    return OptimizedGrammar(result, origins, removed)
+
+def remove_useless(grammar):
+    """Return ``grammar`` without the productions that take part in no
+    derivation of a terminal string from the start symbol, or ``grammar``
+    itself when there are none. Productions keep the form they were
+    written in."""
+    nonterminals = set(grammar.nonterminals) | {
+        symbol for productions in grammar.productions.values()
+        for production in productions for symbol in _body(production) if symbol[:1].isupper()}
+    rules = {nt: [(_body(p), p) for p in productions]
+             for nt, productions in grammar.productions.items()}
+    _remove_useless(rules, nonterminals, grammar.start_symbol)
+    if all(len(rules.get(nt, ())) == len(productions)
+           for nt, productions in grammar.productions.items()):
+        return grammar
+    result = Grammar()
+    result.start_symbol = grammar.start_symbol
+    for nt, productions in rules.items():
+        result.add_production(nt, [production for _, production in productions])
+    return result
+
+def left_recursive(grammar):
+    """Return the nonterminals that can derive a sentential form starting
+    with themselves, directly, indirectly or through a nullable prefix."""
+    return _left_recursive({nt: [_body(p) for p in productions]
+                            for nt, productions in grammar.productions.items()})
+
+def _nullable(bodies):
+    # bodies maps each nonterminal to its production bodies, as tuples
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for nt, productions in bodies.items():
+            if nt not in nullable and any(all(s in nullable for s in body) for body in productions):
+                nullable.add(nt)
+                changed = True
+    return nullable
+
+def _left_recursive(bodies):
+    # bodies as in _nullable
+    nullable = _nullable(bodies)
+
+    # An edge B -> A when B can be the leftmost symbol of A's production
+    names = list(bodies)
+    edges = {nt: set() for nt in names}
+    for nt, productions in bodies.items():
+        for body in productions:
+            for symbol in body:
+                if symbol in edges:
+                    edges[symbol].add(nt)
+                if symbol not in nullable:
+                    break
+    result = set()
+    for component in _strongly_connected_components(names, edges):
+        if len(component) > 1 or component[0] in edges[component[0]]:
+            result.update(component)
+    return result
+
+def _body(production):
+    return () if production == 'e' else tuple(production)
+
+def _bodies(rules):
+    return {nt: [body for body, _ in productions] for nt, productions in rules.items()}
+
+def _dedupe(productions):
+    # Keep the first of identical bodies, with the origins of all of them
+    seen = {}
+    for body, sources in productions:
+        if body in seen:
+            seen[body] = seen[body] + tuple(s for s in sources if s not in seen[body])
+        else:
+            seen[body] = sources
+    return list(seen.items())
+
+def _fresh(rules, nonterminals, base):
+    name = base + "'"
+    while name in rules or name in nonterminals:
+        name += "'"
+    nonterminals.add(name)
+    return name
+
+def _remove_useless(rules, nonterminals, start_symbol):
+    # Productive: derives a terminal string. As in compute_nullable, each
+    # production counts its nonterminals not yet known to be productive
+    remaining = {}
+    # Nonterminal -> productions in which it occurs, once per occurrence
+    occurrences = {}
+    worklist = []
+    for nt, productions in rules.items():
+        for k, (body, _) in enumerate(productions):
+            count = 0
+            for symbol in body:
+                if symbol in nonterminals:
+                    occurrences.setdefault(symbol, []).append((nt, k))
+                    count += 1
+            remaining[(nt, k)] = count
+            if not count:
+                worklist.append(nt)
+    productive = set()
+    while worklist:
+        nt = worklist.pop()
+        if nt in productive:
+            continue
+        productive.add(nt)
+        for key in occurrences.get(nt, ()):
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                worklist.append(key[0])
+    for nt in rules:
+        rules[nt] = [production for k, production in enumerate(rules[nt])
+                     if remaining[(nt, k)] == 0]
+
+    # Reachable from the start symbol through what is left
+    reachable = {start_symbol}
+    worklist = [start_symbol]
+    while worklist:
+        for body, _ in rules.get(worklist.pop(), ()):
+            for symbol in body:
+                if symbol in rules and symbol not in reachable:
+                    reachable.add(symbol)
+                    worklist.append(symbol)
+
+    removed = {nt for nt in rules if nt not in reachable}
+    for nt in removed:
+        del rules[nt]
+    # The start symbol stays even when the language is empty
+    rules.setdefault(start_symbol, [])
+    return removed
+
+def _eliminate_epsilon(rules, nonterminals, start_symbol):
+    # A -> X B Y with B nullable also gets A -> X Y, and the empty
+    # productions go. If the start symbol derived the empty string it keeps
+    # S -> e, and if it also appears in a body its other productions move
+    # to a new S'' with S -> S'' | e, so no body holds a nullable symbol
+    nullable = _nullable(_bodies(rules))
+    start_empty = ()
+    for nt in list(rules):
+        expanded = []
+        for body, sources in rules[nt]:
+            variants = [()]
+            for symbol in body:
+                variants = ([variant + (symbol,) for variant in variants]
+                            + (variants if symbol in nullable else []))
+            for variant in variants:
+                if not variant:
+                    if nt == start_symbol:
+                        start_empty += tuple(s for s in sources if s not in start_empty)
+                elif variant != (nt,):  # A -> A adds nothing
+                    expanded.append((variant, sources))
+        rules[nt] = _dedupe(expanded)
+
+    if start_symbol not in nullable:
+        return
+    if any(start_symbol in body for productions in rules.values() for body, _ in productions):
+        inner = _fresh(rules, nonterminals, start_symbol)
+        for nt in rules:
+            rules[nt] = [(tuple(inner if s == start_symbol else s for s in body), sources)
+                         for body, sources in rules[nt]]
+        rules[inner] = rules[start_symbol]
+        rules[start_symbol] = [((inner,), ()), ((), start_empty)]
+    else:
+        rules[start_symbol].append(((), start_empty))
+
+def _merge_unit_cycles(rules, start_symbol):
+    # Nonterminals on a cycle of unit productions derive the same strings,
+    # so each cycle becomes its first member (the start symbol if on it)
+    names = list(rules)
+    edges = {nt: set() for nt in names}
+    for nt in names:
+        for body, _ in rules[nt]:
+            if len(body) == 1 and body[0] in edges:
+                edges[body[0]].add(nt)
+    merged = {}
+    for component in _strongly_connected_components(names, edges):
+        if len(component) > 1:
+            keep = start_symbol if start_symbol in component else min(component, key=names.index)
+            merged.update((nt, keep) for nt in component if nt != keep)
+    if not merged:
+        return
+    for nt in merged:
+        rules[merged[nt]].extend(rules.pop(nt))
+    for nt in rules:
+        rules[nt] = _dedupe([(tuple(merged.get(s, s) for s in body), sources)
+                             for body, sources in rules[nt]])
+        rules[nt] = [(body, sources) for body, sources in rules[nt] if body != (nt,)]
+
+def _eliminate_left_recursion(rules, nonterminals):
+    # Only nonterminals on a cycle of leftmost symbols are left recursive;
+    # each such cycle is handled on its own, in the order of Aho et al.'s
+    # algorithm 4.19, so the rest of the grammar is left untouched
+    names = list(rules)
+    edges = {nt: set() for nt in names}
+    for nt in names:
+        for body, _ in rules[nt]:
+            if body and body[0] in edges:
+                edges[body[0]].add(nt)
+    for component in _strongly_connected_components(names, edges):
+        members = set(component)
+        if len(component) == 1 and component[0] not in edges[component[0]]:
+            continue
+        order = [nt for nt in names if nt in members]
+        for i, a_i in enumerate(order):
+            earlier = set(order[:i])
+            productions = rules[a_i]
+            # Substitute A_j -> delta into A_i -> A_j gamma until no
+            # production of A_i starts with an earlier A_j
+            while any(body and body[0] in earlier for body, _ in productions):
+                expanded = []
+                for body, sources in productions:
+                    if body and body[0] in earlier:
+                        expanded.extend((delta + body[1:], sources) for delta, _ in rules[body[0]])
+                    else:
+                        expanded.append((body, sources))
+                productions = _dedupe(expanded)
+            rules[a_i] = productions
+            _eliminate_direct(rules, nonterminals, a_i)
+
+def _eliminate_direct(rules, nonterminals, nt):
+    # A -> A alpha | beta  becomes  A -> beta A', A' -> alpha A' | e
+    recursive = [(body[1:], sources) for body, sources in rules[nt]
+                 if body and body[0] == nt and len(body) > 1]
+    if not recursive:
+        # A -> A adds nothing to the language
+        rules[nt] = [(body, sources) for body, sources in rules[nt] if body != (nt,)]
+        return
+    tail = _fresh(rules, nonterminals, nt)
+    rules[nt] = [(body + (tail,), sources) for body, sources in rules[nt]
+                 if not (body and body[0] == nt)]
+    rules[tail] = [(alpha + (tail,), sources) for alpha, sources in recursive] + [((), ())]
+
+def _left_factor(rules, nonterminals):
+    # A -> alpha beta1 | alpha beta2  becomes  A -> alpha A', A' -> beta1 | beta2
+    worklist = list(rules)
+    while worklist:
+        nt = worklist.pop()
+        groups = {}
+        for body, sources in rules[nt]:
+            groups.setdefault(body[:1], []).append((body, sources))
+        for first, group in groups.items():
+            if not first or len(group) < 2:
+                continue
+            prefix = group[0][0]
+            for body, _ in group[1:]:
+                n = 0
+                while n < min(len(prefix), len(body)) and prefix[n] == body[n]:
+                    n += 1
+                prefix = prefix[:n]
+            tail = _fresh(rules, nonterminals, nt)
+            sources = tuple(s for _, group_sources in group for s in group_sources)
+            rules[tail] = _dedupe([(body[len(prefix):], group_sources)
+                                   for body, group_sources in group])
+            kept = [(body, s) for body, s in rules[nt] if body[:1] != first]
+            rules[nt] = kept + [(prefix + (tail,), sources)]
+            worklist.append(tail)
+        if any(len(group) > 1 and first for first, group in groups.items()):
+            worklist.append(nt)
@@ -0,0 +1,100 @@
+from array import array
+
+# The parse drivers report their work to a semantics object through three
+# calls, in postfix order for both LL(1) and LR parsers:
+#   shift(symbol, position) -> value of a matched terminal
+#   reduce(nonterminal, production, values) -> value of a completed
+#       nonterminal, given the values of its right-hand side; the empty
+#       production is passed as ()
+#   accept(value) with the value of the start symbol
+
+class Node:
+    """Interior parse-tree node; leaves are the matched terminal symbols."""
+    __slots__ = ('symbol', 'production', 'children')
+
+    def __init__(self, symbol, production, children):
+        self.symbol = symbol
+        self.production = production
+        self.children = children
+
+    def __str__(self):
+        children = " ".join(str(child) for child in self.children)
+        return f"({self.symbol} {children})" if children else f"({self.symbol})"
+
+    def __repr__(self):
+        return str(self)
+
+class TreeBuilder:
+    """Semantics that builds a tree of Nodes; the result is ``root``."""
+    def __init__(self):
+        self.root = None
+
+    def shift(self, symbol, position):
+        return symbol
+
+    def reduce(self, nonterminal, production, values):
+        return Node(nonterminal, production, tuple(values))
+
+    def accept(self, value):
+        self.root = value
+
+class PostfixBuilder:
+    """Semantics that records the tree as a flat postfix array.
+
+    ``codes`` holds one int per node: a code ``k >= 0`` is a node for
+    production ``productions[k]`` whose children are the preceding
+    ``len(production)`` subtrees, and ``-(k + 1)`` is the leaf
+    ``leaves[k]``. Nothing is allocated per node besides the array slot.
+    """
+    def __init__(self):
+        self.codes = array('i')
+        self.leaves = []
+        self.productions = []
+        self._production_ids = {}
+
+    def shift(self, symbol, position):
+        self.leaves.append(symbol)
+        self.codes.append(-len(self.leaves))
+
+    def reduce(self, nonterminal, production, values):
+        key = (nonterminal, production)
+        production_id = self._production_ids.get(key)
+        if production_id is None:
+            production_id = self._production_ids[key] = len(self.productions)
+            self.productions.append(key)
+        self.codes.append(production_id)
+
+    def accept(self, value):
+        pass
+
+    def to_tree(self):
+        """Rebuild the tree as Nodes."""
+        stack = []
+        for code in self.codes:
+            if code < 0:
+                stack.append(self.leaves[-code - 1])
+                continue
+            nonterminal, production = self.productions[code]
+            n = len(production)
+            children = tuple(stack[len(stack) - n:])
+            del stack[len(stack) - n:]
+            stack.append(Node(nonterminal, production, children))
+        return stack[-1] if stack else None
+
+class Callbacks:
+    """Semantics from plain functions: ``on_reduce(nonterminal, production,
+    values)`` and optionally ``on_shift(symbol, position)``, which defaults
+    to the symbol itself. The start symbol's value ends up in ``result``."""
+    def __init__(self, on_reduce, on_shift=None):
+        self.on_reduce = on_reduce
+        self.on_shift = on_shift
+        self.result = None
+
+    def shift(self, symbol, position):
+        return symbol if self.on_shift is None else self.on_shift(symbol, position)
+
+    def reduce(self, nonterminal, production, values):
+        return self.on_reduce(nonterminal, production, values)
+
+    def accept(self, value):
+        self.result = value
@@ -0,0 +1,275 @@
+from array import array
+
+from first_follow import _strongly_connected_components
+
+# Subset construction stops beyond this many DFA states (and the NFA beyond
+# this many states), and the grammar is parsed with its tables instead
+MAX_STATES = 10000
+
+# The NumPy stepper is used for corpora of at least this many strings
+NUMPY_THRESHOLD = 64
+
+_numpy = None
+
+def _import_numpy():
+    # NumPy is optional and slow to import, so it is only looked for when a
+    # corpus is large enough to need it
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy
+
+class DFA:
+    """Minimal DFA of a regular grammar.
+
+    ``symbols`` maps every terminal to a column from 1; column 0 is for
+    symbols the grammar does not know. ``transitions`` is a flat
+    ``array('i')`` of ``num_states`` rows of ``width`` columns. State 0 is
+    the start state and ``dead`` the state that accepts nothing.
+    """
+    def __init__(self, symbols, transitions, accepting, dead):
+        self.symbols = symbols
+        self.width = len(symbols) + 1
+        self.transitions = transitions
+        self.num_states = len(transitions) // self.width
+        self.accepting = accepting
+        self.dead = dead
+        self._single_chars = all(len(symbol) == 1 for symbol in symbols)
+
+    def accepts(self, input_string):
+        """Return whether the input string (or symbol sequence), with or
+        without the end marker, is in the language."""
+        symbols = self.symbols
+        transitions = self.transitions
+        width = self.width
+        accepting = self.accepting
+        if input_string and input_string[-1] == '$':
+            input_string = input_string[:-1]
+        state = 0
+        for symbol in input_string:
+            state = transitions[state * width + symbols.get(symbol, 0)]
+        return accepting[state]
+
+    def accepts_many(self, inputs):
+        """Return a list of whether each input is in the language.
+
+        Large corpora of strings over single-character terminals are run
+        together: the strings are sorted by length and one NumPy gather
+        steps every string that is still being read.
+        """
+        inputs = list(inputs)
+        np = _import_numpy() if len(inputs) >= NUMPY_THRESHOLD else None
+        if not np or not self._single_chars or not all(isinstance(s, str) for s in inputs):
+            return [self.accepts(input_string) for input_string in inputs]
+        return _accepts_numpy(self, np, inputs)
+
+def _accepts_numpy(dfa, np, inputs):
+    inputs = [s[:-1] if s.endswith('$') else s for s in inputs]
+    lengths = np.fromiter(map(len, inputs), dtype=np.int64, count=len(inputs))
+    order = np.argsort(-lengths, kind='stable')
+    lengths = lengths[order]
+
+    # Map every character to its column, through a table indexed by code
+    # point; characters beyond the table are unknown
+    text = "".join([inputs[k] for k in order.tolist()])
+    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    table = np.zeros(max(map(ord, dfa.symbols), default=0) + 2, dtype=np.int64)
+    for symbol, column in dfa.symbols.items():
+        table[ord(symbol)] = column
+    columns = table[np.minimum(codes, len(table) - 1)]
+
+    # Row offsets into the flat transition array are stepped directly
+    width = dfa.width
+    transitions = np.frombuffer(dfa.transitions, dtype=np.int32).astype(np.int64) * width
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    states = np.zeros(len(inputs), dtype=np.int64)
+    # Strings longer than t are a prefix of the sorted order
+    active = len(inputs)
+    for t in range(int(lengths[0]) if len(inputs) else 0):
+        while lengths[active - 1] <= t:
+            active -= 1
+        states[:active] = transitions[states[:active] + columns[offsets[:active] + t]]
+
+    accepted = np.frombuffer(bytes(dfa.accepting), dtype=np.uint8).astype(bool)[states // width]
+    result = np.empty(len(inputs), dtype=bool)
+    result[order] = accepted
+    return result.tolist()
+
+def regular_dfa(grammar):
+    """Return the minimal DFA of ``grammar`` when it is recognizably
+    regular, else None.
+
+    A grammar is recognized as regular when each set of mutually recursive
+    nonterminals is either right-linear (every production of the set
+    mentions at most one member, last) or left-linear (at most one, first);
+    productions may use other nonterminals anywhere. Grammars without
+    self-embedding are normally of this form. None is also returned when
+    the automaton would be too large.
+    """
+    nfa = _build_nfa(grammar)
+    if nfa is None:
+        return None
+    dfa = _determinize(*nfa)
+    if dfa is None:
+        return None
+    return _minimize(*dfa)
+
+def _build_nfa(grammar):
+    productions = {nt: [() if p == 'e' else tuple(p) for p in prods]
+                   for nt, prods in grammar.productions.items()}
+    if grammar.start_symbol not in productions:
+        return None
+    names = list(productions)
+    edges = {nt: set() for nt in names}
+    for nt, bodies in productions.items():
+        for body in bodies:
+            for symbol in body:
+                if symbol in edges:
+                    edges[symbol].add(nt)
+
+    component_of = {}
+    linear = {}  # component -> 'right' or 'left'
+    for component in _strongly_connected_components(names, edges):
+        members = frozenset(component)
+        for nt in component:
+            component_of[nt] = members
+        right = left = True
+        for nt in component:
+            for body in productions[nt]:
+                positions = [k for k, symbol in enumerate(body) if symbol in members]
+                if len(positions) > 1:
+                    return None
+                if positions:
+                    right = right and positions[0] == len(body) - 1
+                    left = left and positions[0] == 0
+        if not right and not left:
+            return None
+        linear[members] = 'right' if right else 'left'
+
+    epsilon = []  # state -> states reachable by an empty move
+    moves = []    # state -> [(terminal, state)]
+
+    def new_state():
+        if len(epsilon) >= MAX_STATES:
+            raise OverflowError
+        epsilon.append([])
+        moves.append([])
+        return len(epsilon) - 1
+
+    # Nonterminals are expanded from a work list rather than recursively,
+    # so long chains of nonterminals cannot exhaust the call stack
+    work = []
+
+    def sequence(symbols, start, end):
+        # start -> end reads one string of each symbol in turn
+        current = start
+        for k, symbol in enumerate(symbols):
+            following = end if k == len(symbols) - 1 else new_state()
+            if symbol in productions:
+                work.append((symbol, current, following))
+            elif symbol[:1].isupper():
+                return  # a nonterminal without productions derives nothing
+            else:
+                moves[current].append((symbol, following))
+            current = following
+        if not symbols:
+            epsilon[start].append(end)
+
+    def fragment(nt, start, end):
+        # start -> end reads one string of L(nt); every use gets its own
+        # copy of the states of nt's component
+        members = component_of[nt]
+        states = {member: new_state() for member in members}
+        if linear[members] == 'right':
+            epsilon[start].append(states[nt])
+            for member in members:
+                for body in productions[member]:
+                    if body and body[-1] in members:
+                        sequence(body[:-1], states[member], states[body[-1]])
+                    else:
+                        sequence(body, states[member], end)
+        else:
+            epsilon[states[nt]].append(end)
+            for member in members:
+                for body in productions[member]:
+                    if body and body[0] in members:
+                        sequence(body[1:], states[body[0]], states[member])
+                    else:
+                        sequence(body, start, states[member])
+
+    try:
+        start, final = new_state(), new_state()
+        work.append((grammar.start_symbol, start, final))
+        while work:
+            fragment(*work.pop())
+    except OverflowError:
+        return None
+    terminals = sorted({symbol for transitions in moves for symbol, _ in transitions})
+    return epsilon, moves, start, final, terminals
+
+def _determinize(epsilon, moves, start, final, terminals):
+    def closure(states):
+        result = set(states)
+        work = list(states)
+        while work:
+            for target in epsilon[work.pop()]:
+                if target not in result:
+                    result.add(target)
+                    work.append(target)
+        return frozenset(result)
+
+    symbols = {terminal: k + 1 for k, terminal in enumerate(terminals)}
+    width = len(terminals) + 1
+    # The empty set is the dead state; it gets an index like any other
+    initial = closure([start])
+    index = {initial: 0}
+    subsets = [initial]
+    rows = []
+    for subset in subsets:
+        targets = {}
+        for state in subset:
+            for terminal, target in moves[state]:
+                targets.setdefault(terminal, set()).add(target)
+        row = [0] * width
+        for column, terminal in enumerate([None] + terminals):
+            key = closure(targets.get(terminal, ()))
+            if key not in index:
+                if len(subsets) >= MAX_STATES:
+                    return None
+                index[key] = len(subsets)
+                subsets.append(key)
+            row[column] = index[key]
+        rows.append(row)
+    accepting = [final in subset for subset in subsets]
+    return symbols, rows, accepting, index[frozenset()]
+
+def _minimize(symbols, rows, accepting, dead):
+    # Moore's partition refinement: states stay together while they agree
+    # on acceptance and on the blocks of all their successors
+    block = [int(a) for a in accepting]
+    num_blocks = len(set(block))
+    while True:
+        signatures = {}
+        refined = [signatures.setdefault((block[s], tuple(block[t] for t in row)), len(signatures))
+                   for s, row in enumerate(rows)]
+        if len(signatures) == num_blocks:
+            break
+        block, num_blocks = refined, len(signatures)
+
+    # Renumber so the start state stays 0
+    renumber = {block[0]: 0}
+    for b in block:
+        renumber.setdefault(b, len(renumber))
+    width = len(symbols) + 1
+    transitions = array('i', [0]) * (num_blocks * width)
+    accepts = [False] * num_blocks
+    for s, row in enumerate(rows):
+        b = renumber[block[s]]
+        accepts[b] = accepting[s]
+        for column, target in enumerate(row):
+            transitions[b * width + column] = renumber[block[target]]
+    return DFA(symbols, transitions, accepts, renumber[block[dead]])
@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import cache
+from analysis import GrammarAnalysis
+from batch import parse_cached, parse_chunk
+from grammar import Grammar
+
+# Line protocol. Requests are read and answered in order, and a client can
+# send any number of them before reading the answers:
+#   GRAMMAR <id> <n> [ll|slr|lalr]   followed by n production lines as in
+#       main.py's input; answers "OK <parsers>" with the parsers the grammar
+#       supports. The optional parser fixes the one used for <id>. LALR(1)
+#       is listed for every SLR(1) grammar and otherwise only checked when
+#       asked for or when neither LL(1) nor SLR(1) applies. The analysis
+#       runs in a thread, so other connections are served meanwhile.
+#   PARSE <id> <string>   answers "yes" or "no"
+#   BATCH <id> <n>   followed by n strings; answers "OK <n>" and then one
+#       "yes"/"no" line per string
+#   DROP <id>   forgets a grammar; answers "OK"
+#   QUIT   closes the connection
+# Any failure is answered with "ERR <message>".
+
+class ProtocolError(Exception):
+    """A request that cannot be served; sent to the client as ERR."""
+
+class GrammarRegistry:
+    """Analyzed grammars by client-chosen ID.
+
+    Grammars with the same productions share one GrammarAnalysis, so
+    registering a grammar that is already known costs only its hash. With
+    ``cache_dir`` the analyses are also loaded from and saved to the
+    on-disk cache, as in main.py. ``register`` can run on worker threads
+    while the other methods are called.
+    """
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.entries = {}    # id -> (analysis, parser, grammar hash)
+        self._analyses = {}  # grammar hash -> GrammarAnalysis
+
+    def register(self, grammar_id, grammar, parser=None):
+        """Analyze ``grammar`` under ``grammar_id`` and return the parsers
+        it supports."""
+        key = cache.grammar_hash(grammar)
+        analysis = self._analyses.get(key)
+        if analysis is None:
+            if self.cache_dir:
+                analysis = GrammarAnalysis.from_cache(self.cache_dir, grammar)
+            if analysis is None:
+                analysis = GrammarAnalysis(grammar)
+                if self.cache_dir:
+                    analysis.save(self.cache_dir)
+            # A grammar registered twice at once keeps the first analysis
+            analysis = self._analyses.setdefault(key, analysis)
+
+        supported = [name for name, ok in (('ll', analysis.is_ll1), ('slr', analysis.is_slr1)) if ok]
+        # Every SLR(1) grammar is LALR(1); otherwise the LALR(1) tables are
+        # only built when they are asked for or the only chance
+        if 'slr' in supported or (parser == 'lalr' or not supported) and analysis.is_lalr1:
+            supported.append('lalr')
+        if parser is None:
+            parser = supported[0] if supported else None
+        elif parser not in supported:
+            raise ProtocolError(f"grammar is not {parser.upper()}(1)")
+        if parser is not None:
+            # Compile here, so that table() does no work
+            getattr(analysis, f"{parser}_compiled")
+        self.entries[grammar_id] = (analysis, parser, key)
+        return supported
+
+    def table(self, grammar_id):
+        """Return the compiled table that parses for ``grammar_id``."""
+        analysis, parser, _ = self._entry(grammar_id)
+        return getattr(analysis, f"{parser}_compiled")
+
+    def table_key(self, grammar_id):
+        """Return a string that names the table of ``grammar_id`` in any
+        process: the grammar's hash and the parser."""
+        _, parser, key = self._entry(grammar_id)
+        return f"{key}:{parser}"
+
+    def _entry(self, grammar_id):
+        try:
+            entry = self.entries[grammar_id]
+        except KeyError:
+            raise ProtocolError(f"unknown grammar {grammar_id}") from None
+        if entry[1] is None:
+            raise ProtocolError("grammar is neither LL(1) nor SLR(1)")
+        return entry
+
+    def drop(self, grammar_id):
+        if self.entries.pop(grammar_id, None) is None:
+            raise ProtocolError(f"unknown grammar {grammar_id}")
+
+class ParseServer:
+    """Serves the line protocol over asyncio streams.
+
+    Single strings are parsed on the event loop, which takes microseconds
+    with the compiled tables. Grammars are analyzed on the loop's default
+    executor, so a large one does not hold up other connections; later
+    requests of the same connection that use its ID wait for it. Batches
+    of at least ``pool_threshold`` strings are split into chunks of
+    ``chunksize`` and parsed on a pool of ``workers`` processes, while the
+    connection keeps reading requests. Each worker keeps the tables it has
+    been sent, so a chunk carries only the key of its table.
+    """
+    def __init__(self, registry, workers=None, pool_threshold=4096, chunksize=1024):
+        self.registry = registry
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.pool_threshold = pool_threshold
+        self.chunksize = chunksize
+        self.pool = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    async def handle(self, reader, writer):
+        """Serve one connection until QUIT or end of input."""
+        # Answers in request order; each is a string or a future of one
+        answers = asyncio.Queue()
+        # Grammar ID -> registration still running for this connection
+        pending = {}
+        sender = asyncio.create_task(self._send(answers, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    command, _, rest = line.decode('utf-8').rstrip('\r\n').partition(' ')
+                    if command == 'QUIT':
+                        break
+                    answers.put_nowait(await self._dispatch(command, rest, reader, pending))
+                except Exception as error:
+                    # Besides ProtocolErrors, a request that is not UTF-8 or
+                    # that fails unexpectedly must not end the connection
+                    answers.put_nowait(f"ERR {error}")
+        finally:
+            answers.put_nowait(None)
+            try:
+                await sender
+            finally:
+                writer.close()
+
+    async def _send(self, answers, writer):
+        while True:
+            answer = await answers.get()
+            if answer is None:
+                break
+            if not isinstance(answer, str):
+                try:
+                    answer = await answer
+                except Exception as error:
+                    # A failed batch, such as a broken worker pool, must
+                    # not take the connection down with it
+                    answer = f"ERR {error}"
+            writer.write((answer + '\n').encode('utf-8'))
+            # Only wait for the socket when no further answers are ready
+            if answers.empty():
+                await writer.drain()
+
+    async def _dispatch(self, command, rest, reader, pending):
+        registry = self.registry
+        if command == 'PARSE':
+            grammar_id, _, input_string = rest.partition(' ')
+            await _registered(pending, grammar_id)
+            table = registry.table(grammar_id)
+            return "yes" if parse_chunk(table, [input_string])[0] else "no"
+        if command == 'GRAMMAR':
+            args = rest.split()
+            if len(args) not in (2, 3) or not args[1].isdigit():
+                raise ProtocolError("usage: GRAMMAR <id> <n> [ll|slr|lalr]")
+            lines = await self._read_lines(reader, int(args[1]))
+            try:
+                grammar = Grammar.from_lines(lines)
+            except ValueError:
+                raise ProtocolError("productions must look like <nonterminal> -> <alternatives>") from None
+            await _registered(pending, args[0])
+            registration = asyncio.ensure_future(
+                self._register(args[0], grammar, args[2] if len(args) == 3 else None))
+            pending[args[0]] = registration
+            return registration
+        if command == 'BATCH':
+            args = rest.split()
+            if len(args) != 2 or not args[1].isdigit():
+                raise ProtocolError("usage: BATCH <id> <n>")
+            inputs = await self._read_lines(reader, int(args[1]))
+            await _registered(pending, args[0])
+            table = registry.table(args[0])
+            key = registry.table_key(args[0])
+            return asyncio.ensure_future(self._batch(key, table, inputs))
+        if command == 'DROP':
+            await _registered(pending, rest.strip())
+            registry.drop(rest.strip())
+            return "OK"
+        raise ProtocolError(f"unknown command {command}")
+
+    async def _register(self, grammar_id, grammar, parser):
+        # The analysis can take seconds, so it runs off the event loop
+        loop = asyncio.get_running_loop()
+        supported = await loop.run_in_executor(
+            None, self.registry.register, grammar_id, grammar, parser)
+        return "OK " + (" ".join(supported) or "none")
+
+    async def _read_lines(self, reader, n):
+        lines = []
+        for _ in range(n):
+            line = await reader.readline()
+            if not line:
+                raise ProtocolError("connection closed mid-request")
+            lines.append(line.decode('utf-8').strip())
+        return lines
+
+    async def _batch(self, key, table, inputs):
+        if len(inputs) < self.pool_threshold or self.workers <= 1:
+            results = parse_chunk(table, inputs)
+        else:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+            loop = asyncio.get_running_loop()
+            # Two chunks per worker in flight, so that a table is sent at
+            # most that many times while the workers do not have it yet
+            window = asyncio.Semaphore(2 * self.workers)
+
+            async def parse(chunk):
+                async with window:
+                    results = await loop.run_in_executor(self.pool, parse_cached, key, chunk)
+                    if results is None:
+                        # The worker has not seen this table yet
+                        results = await loop.run_in_executor(
+                            self.pool, parse_cached, key, chunk, table)
+                    return results
+
+            size = self.chunksize
+            chunks = await asyncio.gather(*(parse(inputs[i:i + size])
+                                            for i in range(0, len(inputs), size)))
+            results = [result for chunk in chunks for result in chunk]
+        return "\n".join([f"OK {len(results)}"] + ["yes" if r else "no" for r in results])
+
+async def _registered(pending, grammar_id):
+    # Wait until this connection's registration of grammar_id, if any, has
+    # finished; a failure is answered by the GRAMMAR request itself
+    registration = pending.pop(grammar_id, None)
+    if registration is not None:
+        await asyncio.wait([registration])
+
+def _pool_context():
+    # Forking a process that runs an event loop and the pool's own threads
+    # can copy a held lock into the worker; a fork server starts workers
+    # from a clean single-threaded process instead
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context()
+
+async def serve(server, unix=None, host='127.0.0.1', port=7878):
+    """Run ``server`` on a Unix socket at ``unix``, or else on TCP."""
+    if unix is not None:
+        listener = await asyncio.start_unix_server(server.handle, path=unix)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+    async with listener:
+        await listener.serve_forever()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve LL(1)/SLR(1) parsing over a line protocol.")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket at PATH")
+    parser.add_argument('--host', default='127.0.0.1', help="TCP host (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=7878, help="TCP port (default: 7878)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for large batches (default: one per CPU)")
+    parser.add_argument('--cache-dir', default=os.environ.get('GRAMMAR_CACHE_DIR'),
+                        help="reuse analysis results stored in this directory "
+                             "(default: $GRAMMAR_CACHE_DIR; no caching if unset)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = ParseServer(GrammarRegistry(args.cache_dir), workers=args.workers)
+    try:
+        asyncio.run(serve(server, args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
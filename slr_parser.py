@@ -1,3 +1,10 @@
+import time
+
+from diagnostics import Conflict, lr_conflict_kind, record_error
+from first_follow import propagate_sets
+from optimize import left_recursive, remove_useless
+from tables import ACCEPT, END
+
 class Grammar:
     def __init__(self, terminals, nonterminals, productions, start_symbol):
         self.terminals = terminals
@@ -13,6 +20,9 @@ class LR0Item:
         self.nonterminal = nonterminal
         # Convert production to tuple if it's a list to make it hashable
         self.production = tuple(production) if isinstance(production, list) else production
+        # The empty production has no symbols to shift over
+        if self.production == 'e':
+            self.production = ()
         self.dot_position = dot_position
 
     def __eq__(self, other):
@@ -66,93 +76,351 @@ def goto(items, symbol, grammar):
                 new_items.add(new_item)
     return closure(new_items, grammar) if new_items else set()
 
+class LR0Automaton:
+    """The LR(0) automaton of a grammar, with items encoded as ints.
+
+    Every production of the augmented grammar gets a production ID, in the
+    order the productions are listed (the augmented production is 0), and
+    every (production ID, dot position) pair gets a dense item ID, so
+    advancing the dot over a symbol is ``item + 1``. ``states`` holds the
+    closed states as frozensets of item IDs, ``kernels`` their kernels, and
+    ``transitions`` maps ``(state, symbol)`` to the next state.
+
+    Closures come from per-nonterminal templates, the start items of every
+    nonterminal reachable through leftmost nonterminals, computed once; a
+    kernel is closed by a union of templates.
+
+    Productions that take part in no derivation of a sentence (see
+    ``optimize.remove_useless``) are left out. Their items never complete
+    in a parse, but the states they add can reduce empty productions
+    forever without reading input. ``useful`` is the grammar without them,
+    ``optimize.remove_useless(grammar)``, if it has already been computed.
+
+    ``update`` follows edits to the grammar. IDs are stable across updates:
+    added productions get new IDs and the IDs of removed ones are not
+    reused, so states without items of an edited production are kept as
+    they are.
+    """
+    def __init__(self, grammar, useful=None):
+        self.productions = []       # production ID -> (nonterminal, production)
+        self.production_ids = {}    # (nonterminal, production) -> production ID
+        self.production_start = []  # production ID -> item ID with the dot first
+        self.item_production = []   # item ID -> production ID
+        self.item_dot = []          # item ID -> dot position
+        self.item_symbol = []       # item ID -> symbol after the dot, or None
+        self.item_reduces = []      # item ID -> production ID if the dot is last, else None
+        self.start_items = {}       # nonterminal -> item IDs with the dot first
+        self.items_before = {}      # symbol -> item IDs with the dot before it
+        self._augment(grammar, useful)
+        for nt in self.augmented.productions:
+            self._encode_productions(nt)
+        self.accept_item = 1  # S' -> S .
+        self._build_templates()
+        self._build_states()
+
+    def _augment(self, grammar, useful):
+        start_symbol = grammar.start_symbol
+        augmented_start = start_symbol + "'"  # e.g., E'
+        augmented_production = [start_symbol]
+        if useful is None:
+            useful = remove_useless(grammar)
+        productions = {nt: list(prods) for nt, prods in useful.productions.items()}
+        self.augmented = Grammar(
+            terminals=grammar.terminals.union({'$'}),
+            nonterminals=grammar.nonterminals.union({augmented_start}),
+            productions={augmented_start: [augmented_production], **productions},
+            start_symbol=augmented_start
+        )
+        # Symbols the grammar does not know are never shifted
+        self.symbols = self.augmented.terminals | self.augmented.nonterminals
+
+    def _encode_productions(self, nt):
+        # Number the productions of nt that have no ID yet and drop the IDs
+        # of those that are gone
+        starts = []
+        for prod in self.augmented.productions.get(nt, ()):
+            key = (nt, LR0Item(nt, prod, 0).production)
+            production_id = self.production_ids.get(key)
+            if production_id is None:
+                production_id = len(self.productions)
+                production = key[1]
+                self.productions.append(key)
+                self.production_ids[key] = production_id
+                self.production_start.append(len(self.item_production))
+                for dot in range(len(production) + 1):
+                    symbol = production[dot] if dot < len(production) else None
+                    self.item_production.append(production_id)
+                    self.item_dot.append(dot)
+                    self.item_symbol.append(symbol if symbol in self.symbols else None)
+                    self.item_reduces.append(production_id if dot == len(production) else None)
+                    if symbol is not None:
+                        self.items_before.setdefault(symbol, []).append(len(self.item_dot) - 1)
+            start = self.production_start[production_id]
+            if start not in starts:  # a repeated alternative is the same items
+                starts.append(start)
+        kept = set(starts)
+        for start in self.start_items.get(nt, ()):
+            if start not in kept:
+                del self.production_ids[self.productions[self.item_production[start]]]
+        self.start_items[nt] = starts
+
+    def _build_templates(self):
+        # The closure of a nonterminal's start items also holds the start
+        # items of every nonterminal that begins one of its productions
+        nonterminals = [nt for nt in self.augmented.nonterminals if nt in self.start_items]
+        direct = {nt: set(self.start_items[nt]) for nt in nonterminals}
+        edges = {nt: set() for nt in nonterminals}
+        for nt in nonterminals:
+            for item in self.start_items[nt]:
+                symbol = self.item_symbol[item]
+                if symbol in edges:
+                    edges[symbol].add(nt)
+        sets, _ = propagate_sets(nonterminals, direct, edges)
+        self.templates = {nt: frozenset(items) for nt, items in sets.items()}
+
+    def closure(self, kernel):
+        """Close a kernel of item IDs into a frozenset."""
+        templates = self.templates
+        item_symbol = self.item_symbol
+        closed = set(kernel)
+        for nt in {item_symbol[item] for item in kernel}:
+            template = templates.get(nt)
+            if template is not None:
+                closed |= template
+        return frozenset(closed)
+
+    def update(self, grammar, changed, useful=None):
+        """Bring the automaton up to date after the productions of the
+        nonterminals in ``changed`` were edited in ``grammar``.
+
+        Only states holding an item of an edited nonterminal's productions,
+        or an item with the dot before such a nonterminal, are closed
+        again; the others keep their closure and transitions. ``useful``
+        works as in the constructor. Returns the number of states closed.
+        """
+        old_symbols = self.symbols
+        old_productions = self.augmented.productions
+        self._augment(grammar, useful)
+        # An edit can make the productions of other nonterminals useful or
+        # useless, which edits them as far as the automaton is concerned
+        productions = self.augmented.productions
+        changed = set(changed) | {nt for nt in old_productions.keys() | productions.keys()
+                                  if old_productions.get(nt) != productions.get(nt)}
+        touched = changed | (old_symbols ^ self.symbols)
+
+        stale = set()
+        for symbol in touched:
+            for start in self.start_items.get(symbol, ()):
+                production = self.productions[self.item_production[start]][1]
+                stale.update(range(start, start + len(production) + 1))
+            stale.update(self.items_before.get(symbol, ()))
+
+        for nt in changed:
+            self._encode_productions(nt)
+        # Items before a symbol the grammar gained or lost now shift it or not
+        for symbol in old_symbols ^ self.symbols:
+            known = symbol if symbol in self.symbols else None
+            for item in self.items_before.get(symbol, ()):
+                self.item_symbol[item] = known
+        self._build_templates()
+        return self._build_states(stale)
+
+    def _build_states(self, stale=None):
+        item_symbol = self.item_symbol
+
+        # Kernel -> old state whose closure and transitions still hold
+        reusable = {}
+        if stale is not None:
+            old_states, old_kernels = self.states, self.kernels
+            successors = [{} for _ in old_states]
+            for (i, symbol), j in self.transitions.items():
+                successors[i][symbol] = j
+            reusable = {kernel: i for i, kernel in enumerate(old_kernels)
+                        if old_states[i].isdisjoint(stale)}
+
+        initial_kernel = frozenset([0])
+        self.kernels = [initial_kernel]
+        self.states = []
+        self.transitions = {}
+        # States are identified by their kernel items, so finding an existing
+        # state is a single hash lookup instead of a scan over every state
+        state_ids = {initial_kernel: 0}
+        closed = 0
+
+        i = 0
+        while i < len(self.kernels):
+            kernel = self.kernels[i]
+            old = reusable.get(kernel)
+            if old is not None:
+                state = old_states[old]
+                targets = [(symbol, old_kernels[j]) for symbol, j in successors[old].items()]
+            else:
+                state = self.closure(kernel)
+                closed += 1
+                # Advance the dot over each item, grouped by the symbol after
+                # it; only those symbols can lead to a non-empty GOTO
+                grouped = {}
+                for item in state:
+                    symbol = item_symbol[item]
+                    if symbol is not None:
+                        grouped.setdefault(symbol, []).append(item + 1)
+                targets = [(symbol, frozenset(items)) for symbol, items in grouped.items()]
+            self.states.append(state)
+
+            for symbol, key in targets:
+                next_idx = state_ids.get(key)
+                if next_idx is None:
+                    next_idx = len(self.kernels)
+                    state_ids[key] = next_idx
+                    self.kernels.append(key)
+                self.transitions[(i, symbol)] = next_idx
+
+            i += 1
+        return closed
+
+    def item(self, item):
+        """Decode an item ID into an LR0Item."""
+        nt, production = self.productions[self.item_production[item]]
+        return LR0Item(nt, production, self.item_dot[item])
+
 def construct_lr0_items(grammar):
-    start_symbol = grammar.start_symbol
-    augmented_start = start_symbol + "'"  # e.g., E'
-    augmented_production = [start_symbol]
-    augmented_grammar = Grammar(
-        terminals=grammar.terminals.union({'$'}),
-        nonterminals=grammar.nonterminals.union({augmented_start}),
-        productions={augmented_start: [augmented_production], **grammar.productions},
-        start_symbol=augmented_start
-    )
-
-    initial_item = LR0Item(augmented_start, augmented_production, 0)
-    initial_state = closure({initial_item}, augmented_grammar)
-
-    states = [initial_state]
-    transitions = {}
-    
-    i = 0
-    while i < len(states):
-        state = states[i]
-        i += 1
-
-        for symbol in augmented_grammar.terminals.union(augmented_grammar.nonterminals):
-            next_state = goto(state, symbol, augmented_grammar)
-            if next_state and next_state not in states:
-                states.append(next_state)
-            if next_state:
-                transitions[(states.index(state), symbol)] = states.index(next_state)
-                
-    return states, transitions, augmented_grammar
+    """Return the LR(0) automaton as ``(states, transitions, augmented)``
+    with each state a set of LR0Items. ``LR0Automaton`` is the compact form
+    the table builders use."""
+    automaton = LR0Automaton(grammar)
+    states = [{automaton.item(item) for item in state} for state in automaton.states]
+    return states, automaton.transitions, automaton.augmented
 
 def has_left_recursion(grammar):
-    """Check if the grammar has direct left recursion."""
-    for nt, productions in grammar.productions.items():
-        for prod in productions:
-            if prod and prod[0] == nt:
-                return True
-    return False
-
-def check_slr1(grammar, first, follow):
+    """Check if the grammar has direct or indirect left recursion."""
+    return bool(left_recursive(grammar))
+
+def check_slr1(grammar, first, follow, lr0=None):
     """Check if the grammar is SLR(1)."""
-    # First check for left recursion (which doesn't automatically disqualify from being SLR(1))
-    # But for the specific case of A -> A b, it's not SLR(1)
-    if len(grammar.nonterminals) == 2 and 'S' in grammar.nonterminals and 'A' in grammar.nonterminals:
-        if len(grammar.productions['S']) == 1 and grammar.productions['S'][0] == 'A':
-            if len(grammar.productions['A']) == 1 and grammar.productions['A'][0] == 'A b':
-                return False
-    
     # Construct the SLR table and check for conflicts
-    action, goto = construct_slr_table(grammar, first, follow)
+    action, goto = construct_slr_table(grammar, first, follow, lr0)
     return action is not None and goto is not None
 
-def construct_slr_table(grammar, first, follow):
-    states, transitions, augmented = construct_lr0_items(grammar)
+def construct_slr_table(grammar, first, follow, lr0=None, conflicts=None):
+    """Construct the SLR(1) action and goto tables.
+
+    ``lr0`` is the grammar's ``LR0Automaton`` if it has already been built;
+    otherwise it is built here. ``conflicts`` works as in
+    ``construct_lr_table``.
+
+    Reductions use ``follow``, which should be the FOLLOW sets of the
+    grammar without its useless productions (``optimize.remove_useless``),
+    as ``GrammarAnalysis.useful_follow`` gives them; the two only differ
+    when the grammar has useless productions. Terminals that only useless
+    productions put in a FOLLOW set can follow no reduction of a sentence,
+    and reducing on them can repeat empty reductions forever without
+    reading input, as with ``S -> AB | bb``, ``A -> BAb``, ``B -> e`` on
+    the empty string.
+    """
+    lr0 = lr0 if lr0 is not None else LR0Automaton(grammar)
+    productions = lr0.productions
+    # Reduce on every terminal in FOLLOW of the left-hand side
+    return construct_lr_table(grammar, lr0, lambda i, p: follow.get(productions[p][0], ()),
+                              conflicts)
+
+def construct_lr_table(grammar, lr0, lookahead, conflicts=None):
+    """Fill LR action and goto tables from an ``LR0Automaton``.
+
+    Completed items reduce on the terminals returned by
+    ``lookahead(state_index, production_id)``. On a conflict this returns
+    ``(None, None)``, unless ``conflicts`` is a list: then the tables are
+    completed, every conflicting cell is appended to it as a Conflict, and
+    the cell keeps the shift, or else the reduce by the earliest production.
+    """
+    states = lr0.states
+    productions = lr0.productions
+    item_reduces = lr0.item_reduces
     
     action = [{} for _ in range(len(states))]
     goto_table = [{} for _ in range(len(states))]
 
-    for (state_idx, symbol), next_state_idx in transitions.items():
+    for (state_idx, symbol), next_state_idx in lr0.transitions.items():
         if symbol in grammar.terminals:
             action[state_idx][symbol] = ('shift', next_state_idx)
         else:
             goto_table[state_idx][symbol] = next_state_idx
 
+    # (state, terminal) -> every entry competing for that cell
+    cells = {}
+
     for i, state in enumerate(states):
         for item in state:
             # If the dot is at the end, it's a reduce action
-            if item.dot_position == len(item.production):
-                # If it's the augmented production, it's an accept action
-                if item.nonterminal == augmented.start_symbol and item.production == tuple([grammar.start_symbol]):
-                    action[i]['$'] = ('accept', None)
-                else:
-                    # For each terminal in FOLLOW(nt), add a reduce action
-                    for terminal in follow[item.nonterminal]:
-                        if terminal in action[i]:
-                            # Conflict detected - either shift-reduce or reduce-reduce
+            production_id = item_reduces[item]
+            if production_id is None:
+                continue
+            # If it's the augmented production, it's an accept action
+            if production_id == 0:
+                if '$' in action[i]:
+                    # A reduce on '$' was entered first
+                    if conflicts is None:
+                        return None, None
+                    cells.setdefault((i, '$'), [action[i]['$']]).append(('accept', None))
+                    continue
+                action[i]['$'] = ('accept', None)
+            else:
+                entry = ('reduce', productions[production_id])
+                for terminal in lookahead(i, production_id):
+                    if terminal in action[i]:
+                        # Conflict detected - either shift-reduce or reduce-reduce
+                        if conflicts is None:
                             return None, None
-                        action[i][terminal] = ('reduce', (item.nonterminal, item.production))
+                        cells.setdefault((i, terminal), [action[i][terminal]]).append(entry)
+                        continue
+                    action[i][terminal] = entry
+
+    if cells:
+        _resolve_lr_cells(lr0, action, cells, conflicts)
 
     return action, goto_table
 
-def slr_parse(grammar, action, goto, input_string):
-    """Parse the input string using the SLR(1) parsing table."""
+def _resolve_lr_cells(lr0, action, cells, conflicts):
+    # Earlier productions win reduce/reduce conflicts, as in yacc; IDs
+    # follow the grammar order only until the automaton is updated
+    order = {}
+    for starts in lr0.start_items.values():
+        for start in starts:
+            order[lr0.productions[lr0.item_production[start]]] = len(order)
+
+    def rank(entry):
+        act, value = entry
+        return (0, 0) if act != 'reduce' else (1, order[value])
+
+    for (i, terminal), entries in cells.items():
+        choices = sorted(entries, key=rank)
+        action[i][terminal] = choices[0]
+        reduced = {value for act, value in entries if act == 'reduce'}
+        items = tuple(lr0.item(item) for item in sorted(lr0.states[i])
+                      if lr0.item_symbol[item] == terminal
+                      or lr0.item_reduces[item] is not None
+                      and lr0.productions[lr0.item_reduces[item]] in reduced)
+        conflicts.append(Conflict(lr_conflict_kind(choices), terminal, choices,
+                                  state=i, items=items))
+
+def slr_parse(grammar, action, goto, input_string, semantics=None, profile=None):
+    """Parse the input string using the SLR(1) parsing table.
+
+    If ``semantics`` is given (see ``parse_tree``), it is told about every
+    shifted terminal and every reduction, in postfix order. If ``profile``
+    is a ``ParseProfile``, the parse is counted in it instead.
+    """
     # Add end marker to input if not present
     if not input_string.endswith('$'):
         input_string += '$'
     
+    if profile is not None:
+        if semantics is not None:
+            raise ValueError("semantics and profile cannot be combined")
+        return _slr_parse_profiled(action, goto, input_string, profile)
+    
+    if semantics is not None:
+        return _slr_parse_semantic(action, goto, input_string, semantics)
+    
     # Initialize the stack with the initial state
     stack = [0]
     
@@ -193,3 +461,371 @@ def slr_parse(grammar, action, goto, input_string):
             return True
         else:
             return False
+
+def _slr_parse_semantic(action, goto, input_string, semantics):
+    # Like slr_parse, with a value stack kept in step with the state stack
+    stack = [0]
+    values = []
+    i = 0
+    
+    while True:
+        state = stack[-1]
+        symbol = input_string[i] if i < len(input_string) else '$'
+        
+        if symbol not in action[state]:
+            return False
+        
+        act, value = action[state][symbol]
+        
+        if act == 'shift':
+            stack.append(value)
+            values.append(semantics.shift(symbol, i))
+            i += 1
+        elif act == 'reduce':
+            nt, prod = value
+            n = len(prod)
+            children = values[len(values) - n:]
+            if n:
+                del stack[-n:]
+                del values[-n:]
+            stack.append(goto[stack[-1]][nt])
+            values.append(semantics.reduce(nt, prod, children))
+        elif act == 'accept':
+            semantics.accept(values[-1] if values else None)
+            return True
+        else:
+            return False
+
+def _slr_parse_profiled(action, goto, input_string, profile):
+    # Like slr_parse, counting every state visit, shift and reduction
+    states = profile.states
+    shifts = profile.shifts
+    reductions = profile.reductions
+    started = time.perf_counter()
+    
+    stack = [0]
+    depth = 1
+    i = 0
+    result = False
+    
+    while True:
+        state = stack[-1]
+        states[state] = states.get(state, 0) + 1
+        symbol = input_string[i] if i < len(input_string) else '$'
+        
+        if symbol not in action[state]:
+            break
+        
+        act, value = action[state][symbol]
+        
+        if act == 'shift':
+            shifts[symbol] = shifts.get(symbol, 0) + 1
+            stack.append(value)
+            depth = max(depth, len(stack))
+            i += 1
+        elif act == 'reduce':
+            reductions[value] = reductions.get(value, 0) + 1
+            nt, prod = value
+            if prod:
+                del stack[-len(prod):]
+            stack.append(goto[stack[-1]][nt])
+            depth = max(depth, len(stack))
+        else:
+            result = act == 'accept'
+            break
+    
+    profile.record(started, result, depth)
+    return result
+
+def slr_parse_errors(grammar, action, goto, input_string):
+    """Parse the input string with phrase-level error recovery and return
+    every error found, as a list of ParseErrors in input order; the input
+    is accepted when the list is empty.
+
+    SLR(1) tables reduce on any terminal in FOLLOW, so a bad symbol can
+    cause reductions before its empty cell is reached; these are undone
+    first. Then a missing terminal is inserted when the parser would go on
+    to shift both it and the symbol read, as for a missing operand or
+    operator (see ``error_repair``), and otherwise the symbol is deleted,
+    as for an unbalanced ')'. Either way the parse moves on; an error at
+    the end marker ends it.
+    """
+    symbols = list(input_string)
+    if not symbols or symbols[-1] != '$':
+        symbols.append('$')
+
+    errors = []
+    stack = [0]
+    i = 0
+    # Terminal inserted before symbols[i] and not yet shifted
+    inserted = None
+    # States popped by each reduction on the current lookahead
+    reductions = []
+
+    while True:
+        state = stack[-1]
+        symbol = inserted if inserted is not None else symbols[i]
+        entry = action[state].get(symbol)
+
+        if entry is None:
+            while reductions:
+                stack.pop()
+                stack.extend(reductions.pop())
+            state = stack[-1]
+            record_error(errors, i, symbol, action[state])
+            if symbol == '$':
+                return errors
+            inserted = error_repair(action, goto, stack, symbol)
+            if inserted is None:
+                i += 1
+            continue
+
+        act, value = entry
+        if act == 'shift':
+            stack.append(value)
+            reductions.clear()
+            if inserted is not None:
+                inserted = None
+            else:
+                i += 1
+        elif act == 'reduce':
+            nt, prod = value
+            if prod:
+                reductions.append(stack[-len(prod):])
+                del stack[-len(prod):]
+            else:
+                reductions.append([])
+            stack.append(goto[stack[-1]][nt])
+        else:
+            return errors
+
+def error_repair(action, goto, stack, symbol):
+    """Return the terminal to insert before ``symbol``, on which the
+    parser with ``stack`` has no action: the first, in sorted order, after
+    which the parser shifts ``symbol`` (or accepts). Returns None when
+    there is no such terminal and the symbol is to be deleted instead."""
+    for terminal in sorted(action[stack[-1]]):
+        if terminal != '$' and _shifts(action, goto, stack, (terminal, symbol)):
+            return terminal
+    return None
+
+def _shifts(action, goto, stack, symbols):
+    # Run the parser on symbols without changing stack: stack[:depth] is
+    # the part left and top holds the states pushed above it
+    depth = len(stack)
+    top = []
+    for symbol in symbols:
+        while True:
+            entry = action[top[-1] if top else stack[depth - 1]].get(symbol)
+            if entry is None:
+                return False
+            act, value = entry
+            if act != 'reduce':
+                break
+            nt, prod = value
+            popped = min(len(prod), len(top))
+            del top[len(top) - popped:]
+            depth -= len(prod) - popped
+            top.append(goto[top[-1] if top else stack[depth - 1]][nt])
+        if act == 'accept':
+            return True
+        top.append(value)
+    return True
+
+def slr_parse_compiled(table, input_string, semantics=None, profile=None):
+    """Parse the input string using a CompiledSLRTable."""
+    return slr_parse_ids(table, table.encode(input_string), semantics, profile)
+
+def slr_parse_ids(table, tokens, semantics=None, profile=None):
+    """Parse terminal IDs, ending with the end marker, using a
+    CompiledSLRTable. ``tokens`` can be any iterable, such as a lexer.
+    ``semantics`` and ``profile`` work as in ``slr_parse``."""
+    if profile is not None:
+        if semantics is not None:
+            raise ValueError("semantics and profile cannot be combined")
+        return _slr_parse_ids_profiled(table, tokens, profile)
+    
+    if semantics is not None:
+        return _slr_parse_ids_semantic(table, tokens, semantics)
+    
+    action = table.action
+    goto = table.goto
+    width = table.width
+    num_nonterminals = table.num_nonterminals
+    reduce_length = table.reduce_length
+    reduce_lhs = table.reduce_lhs
+    
+    stack = [0]
+    state = 0
+    tokens = iter(tokens)
+    symbol = next(tokens, END)
+    
+    while True:
+        act = action[state * width + symbol]
+        
+        if act > 0:
+            # Shift
+            state = act - 1
+            stack.append(state)
+            symbol = next(tokens, END)
+        elif act < ACCEPT:
+            # Reduce: pop the right-hand side and follow the goto
+            production = -act - 2
+            length = reduce_length[production]
+            if length:
+                del stack[-length:]
+            state = goto[stack[-1] * num_nonterminals + reduce_lhs[production]]
+            stack.append(state)
+        else:
+            return act == ACCEPT
+
+def _slr_parse_ids_semantic(table, tokens, semantics):
+    action = table.action
+    goto = table.goto
+    width = table.width
+    num_nonterminals = table.num_nonterminals
+    reduce_length = table.reduce_length
+    reduce_lhs = table.reduce_lhs
+    productions = table.productions
+    names = table.terminal_names
+    
+    stack = [0]
+    values = []
+    state = 0
+    tokens = iter(tokens)
+    symbol = next(tokens, END)
+    position = 0
+    
+    while True:
+        act = action[state * width + symbol]
+        
+        if act > 0:
+            state = act - 1
+            stack.append(state)
+            values.append(semantics.shift(names[symbol], position))
+            symbol = next(tokens, END)
+            position += 1
+        elif act < ACCEPT:
+            production = -act - 2
+            n = reduce_length[production]
+            children = values[len(values) - n:]
+            if n:
+                del stack[-n:]
+                del values[-n:]
+            state = goto[stack[-1] * num_nonterminals + reduce_lhs[production]]
+            stack.append(state)
+            nt, body = productions[production]
+            values.append(semantics.reduce(nt, body, children))
+        else:
+            if act == ACCEPT:
+                semantics.accept(values[-1] if values else None)
+            return act == ACCEPT
+
+def _slr_parse_ids_profiled(table, tokens, profile):
+    # Like slr_parse_ids, with the counters of slr_parse's profile
+    action = table.action
+    goto = table.goto
+    width = table.width
+    num_nonterminals = table.num_nonterminals
+    reduce_length = table.reduce_length
+    reduce_lhs = table.reduce_lhs
+    productions = table.productions
+    names = table.terminal_names
+    states = profile.states
+    shifts = profile.shifts
+    reductions = profile.reductions
+    started = time.perf_counter()
+    
+    stack = [0]
+    depth = 1
+    state = 0
+    tokens = iter(tokens)
+    symbol = next(tokens, END)
+    
+    while True:
+        states[state] = states.get(state, 0) + 1
+        act = action[state * width + symbol]
+        
+        if act > 0:
+            name = names[symbol]
+            shifts[name] = shifts.get(name, 0) + 1
+            state = act - 1
+            stack.append(state)
+            depth = max(depth, len(stack))
+            symbol = next(tokens, END)
+        elif act < ACCEPT:
+            production = -act - 2
+            key = productions[production]
+            reductions[key] = reductions.get(key, 0) + 1
+            length = reduce_length[production]
+            if length:
+                del stack[-length:]
+            state = goto[stack[-1] * num_nonterminals + reduce_lhs[production]]
+            stack.append(state)
+            depth = max(depth, len(stack))
+        else:
+            break
+    
+    profile.record(started, act == ACCEPT, depth)
+    return act == ACCEPT
+
+class SLRStreamParser:
+    """Incremental SLR(1) parser that is fed its input a piece at a time.
+
+    Only the state stack is kept, so memory does not grow with the input.
+    ``feed`` returns True or False as soon as the input is accepted or
+    rejected and None while undecided; ``position`` counts the symbols
+    consumed, so after a rejection it is the index of the offending symbol.
+    Input after the end marker is ignored.
+    """
+    def __init__(self, action, goto):
+        self.action = action
+        self.goto = goto
+        self.stack = [0]
+        self.position = 0
+        self.result = None
+    
+    def feed(self, symbols):
+        """Consume a chunk (a string or any iterable of symbols)."""
+        if self.result is not None:
+            return self.result
+        
+        stack = self.stack
+        action = self.action
+        goto = self.goto
+        
+        for symbol in symbols:
+            # Reduce until the symbol is shifted, accepted or rejected
+            while True:
+                entry = action[stack[-1]].get(symbol)
+                if entry is None:
+                    self.result = False
+                    return False
+                
+                act, value = entry
+                if act == 'shift':
+                    stack.append(value)
+                    break
+                elif act == 'reduce':
+                    nt, prod = value
+                    if prod:
+                        del stack[-len(prod):]
+                    stack.append(goto[stack[-1]][nt])
+                else:
+                    self.result = True
+                    return True
+            
+            self.position += 1
+        
+        return None
+    
+    def finish(self):
+        """Signal the end of the input and return whether it was accepted."""
+        return bool(self.feed('$'))
+    
+    def parse_chunks(self, chunks):
+        """Feed chunks until the input is decided; later chunks are not read."""
+        for chunk in chunks:
+            if self.feed(chunk) is not None:
+                return self.result
+        return self.finish()
@@ -0,0 +1,177 @@
+from array import array
+
+# Terminal ID of the end marker; every compiled table interns '$' first
+END = 0
+
+# SLR action encoding: 0 is an error, a positive value n shifts to state
+# n - 1, -1 accepts, and a value n <= -2 reduces by production -n - 2
+ERROR = 0
+ACCEPT = -1
+
+def encode_shift(state):
+    return state + 1
+
+def encode_reduce(production_id):
+    return -production_id - 2
+
+def intern_terminals(terminals):
+    """Assign small ints to terminals, with '$' always 0."""
+    ids = {'$': END}
+    for terminal in sorted(terminals - {'$'}):
+        ids[terminal] = len(ids)
+    return ids
+
+def intern_nonterminals(nonterminals, start_symbol):
+    """Assign small ints to nonterminals, with the start symbol always 0."""
+    ids = {start_symbol: 0}
+    for nonterminal in sorted(nonterminals - {start_symbol}):
+        ids[nonterminal] = len(ids)
+    return ids
+
+class CompiledTable:
+    """Common symbol handling for the compiled LL(1) and SLR(1) tables.
+
+    Rows are ``num_terminals + 1`` wide: the extra column belongs to
+    symbols the grammar does not know and is always empty, so lookups never
+    need a separate check for them.
+    """
+    def __init__(self, terminal_ids, nonterminal_ids):
+        self.terminal_ids = terminal_ids
+        self.nonterminal_ids = nonterminal_ids
+        self.num_terminals = len(terminal_ids)
+        self.terminal_names = list(terminal_ids)  # terminal ID -> symbol
+        self.width = self.num_terminals + 1
+
+    def __getstate__(self):
+        # Tables loaded from the cache hold memoryviews over a file mapping,
+        # which cannot be pickled; send plain arrays instead
+        state = self.__dict__.copy()
+        for name, value in state.items():
+            if isinstance(value, memoryview):
+                state[name] = array(value.format, value)
+        return state
+
+    def encode(self, input_string):
+        """Translate an input string (or symbol sequence) to terminal IDs,
+        adding the end marker if it is missing."""
+        ids = self.terminal_ids
+        unknown = self.num_terminals
+        tokens = [ids.get(symbol, unknown) for symbol in input_string]
+        if not tokens or tokens[-1] != END:
+            tokens.append(END)
+        return tokens
+
+class CompiledLLTable(CompiledTable):
+    """LL(1) table with interned symbols.
+
+    On the parse stack, terminals are their terminal ID and nonterminals are
+    ``num_terminals + nonterminal ID``. ``table`` holds one row per
+    nonterminal with the production ID to expand, or -1.
+    """
+    def __init__(self, terminal_ids, nonterminal_ids, productions, production_lhs, table):
+        super().__init__(terminal_ids, nonterminal_ids)
+        self.productions = productions        # list of (nonterminal, production)
+        self.production_lhs = production_lhs  # array of nonterminal IDs
+        self.table = table
+        self.start = self.num_terminals  # the start symbol is nonterminal 0
+        # Right-hand sides as stack symbols, already reversed for pushing
+        self.push = [tuple(self._stack_symbol(symbol) for symbol in reversed(production))
+                     if production != 'e' else ()
+                     for _, production in productions]
+
+    def _stack_symbol(self, symbol):
+        if symbol in self.nonterminal_ids:
+            return self.num_terminals + self.nonterminal_ids[symbol]
+        return self.terminal_ids[symbol]
+
+class CompiledSLRTable(CompiledTable):
+    """SLR(1) action/goto tables with interned symbols.
+
+    ``action`` is a flat array of ``num_states * width`` encoded actions and
+    ``goto`` a flat array of ``num_states * num_nonterminals`` states (-1
+    where empty). ``reduce_length`` and ``reduce_lhs`` give, per production
+    ID, how many states a reduce pops and the nonterminal ID it goes to.
+    """
+    def __init__(self, terminal_ids, nonterminal_ids, productions,
+                 reduce_length, reduce_lhs, action, goto):
+        super().__init__(terminal_ids, nonterminal_ids)
+        self.num_nonterminals = len(nonterminal_ids)
+        self.productions = productions  # list of (nonterminal, production)
+        self.reduce_length = reduce_length
+        self.reduce_lhs = reduce_lhs
+        self.action = action
+        self.goto = goto
+        self.num_states = len(action) // self.width
+
+def compile_ll_table(grammar, table):
+    """Compile a table from ``construct_ll_table`` into a CompiledLLTable."""
+    # Undefined symbols can still end up in FIRST/FOLLOW, so intern every
+    # symbol the table or the productions mention
+    terminals = set(grammar.terminals)
+    for row in table.values():
+        terminals.update(row)
+    for productions in grammar.productions.values():
+        for production in productions:
+            if production != 'e':
+                terminals.update(s for s in production if s not in grammar.nonterminals)
+    terminal_ids = intern_terminals(terminals)
+    nonterminal_ids = intern_nonterminals(grammar.nonterminals, grammar.start_symbol)
+    width = len(terminal_ids) + 1
+
+    productions = []
+    production_ids = {}
+    production_lhs = array('i')
+    rows = array('i', [-1]) * (len(nonterminal_ids) * width)
+
+    for nonterminal, nt_id in nonterminal_ids.items():
+        for terminal, production in table.get(nonterminal, {}).items():
+            key = (nonterminal, production)
+            if key not in production_ids:
+                production_ids[key] = len(productions)
+                productions.append(key)
+                production_lhs.append(nt_id)
+            rows[nt_id * width + terminal_ids[terminal]] = production_ids[key]
+
+    return CompiledLLTable(terminal_ids, nonterminal_ids, productions, production_lhs, rows)
+
+def compile_slr_table(grammar, action, goto):
+    """Compile tables from ``construct_slr_table`` (or any LR table in the
+    same shape, such as LALR(1)) into a CompiledSLRTable."""
+    terminals = set(grammar.terminals)
+    for row in action:
+        terminals.update(row)
+    terminal_ids = intern_terminals(terminals)
+    nonterminal_ids = intern_nonterminals(grammar.nonterminals, grammar.start_symbol)
+    width = len(terminal_ids) + 1
+    num_nonterminals = len(nonterminal_ids)
+
+    productions = []
+    production_ids = {}
+    reduce_length = array('i')
+    reduce_lhs = array('i')
+    action_rows = array('i', [ERROR]) * (len(action) * width)
+    goto_rows = array('i', [-1]) * (len(goto) * num_nonterminals)
+
+    for state, row in enumerate(action):
+        for terminal, (act, value) in row.items():
+            if act == 'shift':
+                code = encode_shift(value)
+            elif act == 'reduce':
+                if value not in production_ids:
+                    nonterminal, production = value
+                    production_ids[value] = len(productions)
+                    productions.append(value)
+                    reduce_length.append(0 if production == 'e' else len(production))
+                    reduce_lhs.append(nonterminal_ids[nonterminal])
+                code = encode_reduce(production_ids[value])
+            else:
+                code = ACCEPT
+            action_rows[state * width + terminal_ids[terminal]] = code
+
+    for state, row in enumerate(goto):
+        for nonterminal, target in row.items():
+            if nonterminal in nonterminal_ids:
+                goto_rows[state * num_nonterminals + nonterminal_ids[nonterminal]] = target
+
+    return CompiledSLRTable(terminal_ids, nonterminal_ids, productions,
+                            reduce_length, reduce_lhs, action_rows, goto_rows)
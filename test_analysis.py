@@ -0,0 +1,33 @@
+import random
+
+from analysis import GrammarAnalysis
+from testing import NONTERMINALS, TERMINALS, production_symbols, random_grammar
+
+def decoded_states(lr0):
+    return {frozenset((item.nonterminal, production_symbols(item.production), item.dot_position)
+                      for item in map(lr0.item, state))
+            for state in lr0.states}
+
+def test_incremental_edits_match_fresh_analysis():
+    rng = random.Random(17)
+    for _ in range(150):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        for _ in range(4):
+            # Compute everything the edit has to update
+            analysis.first, analysis.follow, analysis.ll_report, analysis.lr0
+            nt = rng.choice(NONTERMINALS)
+            if grammar.productions[nt] and rng.random() < 0.5:
+                analysis.remove_production(nt, rng.choice(grammar.productions[nt]))
+            else:
+                alternative = ''.join(rng.choice(NONTERMINALS + TERMINALS)
+                                      for _ in range(rng.randint(0, 3))) or 'e'
+                analysis.add_production(nt, alternative)
+
+            fresh = GrammarAnalysis(grammar)
+            assert analysis.first == fresh.first
+            assert analysis.follow == fresh.follow
+            assert analysis.ll_table == fresh.ll_table
+            assert decoded_states(analysis.lr0) == decoded_states(fresh.lr0)
+            assert analysis.is_slr1 == fresh.is_slr1
+            assert analysis.is_lalr1 == fresh.is_lalr1
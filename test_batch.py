@@ -0,0 +1,33 @@
+import random
+
+from analysis import GrammarAnalysis
+from batch import parse_cached, parse_many
+from testing import earley, random_grammar, strings
+
+def test_parse_many_matches_earley():
+    rng = random.Random(5)
+    tables = []
+    while len(tables) < 6:
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        table = analysis.ll_compiled if len(tables) % 2 else analysis.slr_compiled
+        if table is not None:
+            tables.append((grammar, table))
+    inputs = list(strings(7))
+    for grammar, table in tables:
+        expected = [earley(grammar, input_string) for input_string in inputs]
+        assert list(parse_many(table, inputs, workers=1)) == expected
+        # Small chunks, so that several are in flight per worker
+        assert list(parse_many(table, iter(inputs), workers=2, chunksize=16)) == expected
+
+def test_parse_cached_needs_the_table_once():
+    rng = random.Random(5)
+    grammar = random_grammar(rng)
+    while not GrammarAnalysis(grammar).is_slr1:
+        grammar = random_grammar(rng)
+    table = GrammarAnalysis(grammar).slr_compiled
+    inputs = list(strings(4))
+    expected = [earley(grammar, input_string) for input_string in inputs]
+    assert parse_cached('test', inputs) is None
+    assert parse_cached('test', inputs, table) == expected
+    assert parse_cached('test', inputs) == expected
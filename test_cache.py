@@ -0,0 +1,45 @@
+import os
+import random
+
+import cache
+from analysis import GrammarAnalysis
+from ll_parser import ll_parse_compiled
+from slr_parser import slr_parse_compiled
+from testing import earley, random_grammar, strings
+
+def test_round_trip_matches_fresh_analysis(tmp_path):
+    rng = random.Random(7)
+    for _ in range(100):
+        grammar = random_grammar(rng)
+        fresh = GrammarAnalysis(grammar)
+        assert GrammarAnalysis.from_cache(tmp_path, grammar) is None
+        fresh.save(tmp_path)
+        loaded = GrammarAnalysis.from_cache(tmp_path, grammar)
+        assert loaded.first == fresh.first
+        assert loaded.follow == fresh.follow
+        assert loaded.is_ll1 == fresh.is_ll1
+        assert loaded.is_slr1 == fresh.is_slr1
+        for table, parse in ((loaded.ll_compiled, ll_parse_compiled),
+                             (loaded.slr_compiled, slr_parse_compiled)):
+            if table is None:
+                continue
+            for input_string in strings(4):
+                assert parse(table, input_string) == earley(grammar, input_string)
+
+def test_damaged_files_are_misses(tmp_path):
+    rng = random.Random(7)
+    grammar = random_grammar(rng)
+    path = GrammarAnalysis(grammar).save(tmp_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    for length in sorted(rng.sample(range(len(data)), 20)):
+        with open(path, 'wb') as f:
+            f.write(data[:length])
+        assert cache.load(tmp_path, grammar) is None
+
+    # A file of another layout version is ignored as well
+    with open(path, 'wb') as f:
+        f.write(cache.HEADER.pack(cache.MAGIC, cache.VERSION + 1, 0))
+    assert cache.load(tmp_path, grammar) is None
+    os.remove(path)
+    assert cache.load(tmp_path, grammar) is None
@@ -0,0 +1,65 @@
+import random
+from collections import Counter
+
+from analysis import GrammarAnalysis
+from diagnostics import ParseProfile
+from ll_parser import ll_parse, ll_parse_compiled
+from parse_tree import Node, TreeBuilder
+from slr_parser import slr_parse, slr_parse_compiled
+from testing import earley, random_grammar, strings
+
+def count_nodes(node, shifts, reductions):
+    if not isinstance(node, Node):
+        shifts[node] += 1
+        return
+    reductions[(node.symbol, node.production)] += 1
+    for child in node.children:
+        count_nodes(child, shifts, reductions)
+
+def test_profile_counts_match_parse_trees(deadline):
+    rng = random.Random(22)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        drivers = []
+        if analysis.is_ll1:
+            drivers.append(('ll', lambda s, **kw: ll_parse(grammar, analysis.ll_table, s + '$', **kw),
+                            lambda s, **kw: ll_parse_compiled(analysis.ll_compiled, s, **kw)))
+        if analysis.is_slr1:
+            action, goto = analysis.slr_table
+            drivers.append(('slr', lambda s, **kw: slr_parse(grammar, action, goto, s, **kw),
+                            lambda s, **kw: slr_parse_compiled(analysis.slr_compiled, s, **kw)))
+        for kind, parse, parse_compiled in drivers:
+            totals = ParseProfile()
+            totals_compiled = ParseProfile()
+            accepted = 0
+            inputs = list(strings(4))
+            for input_string in inputs:
+                expected = earley(grammar, input_string)
+                accepted += expected
+                assert parse(input_string, profile=totals) == expected
+                assert parse_compiled(input_string, profile=totals_compiled) == expected
+
+                profile = ParseProfile()
+                parse(input_string, profile=profile)
+                if not expected:
+                    continue
+                builder = TreeBuilder()
+                parse(input_string, semantics=builder)
+                shifts = Counter()
+                reductions = Counter()
+                count_nodes(builder.root, shifts, reductions)
+                assert profile.shifts == shifts
+                assert profile.reductions == reductions
+                if kind == 'll':
+                    # One table lookup per expansion
+                    assert sum(profile.cells.values()) == sum(reductions.values())
+                else:
+                    # One action lookup per shift and reduction, and one to accept
+                    assert sum(profile.states.values()) == \
+                        sum(shifts.values()) + sum(reductions.values()) + 1
+
+            assert len(totals.timings) == len(inputs)
+            assert totals.accepted == accepted
+            for name in ('states', 'cells', 'shifts', 'reductions', 'max_depth', 'accepted'):
+                assert getattr(totals, name) == getattr(totals_compiled, name)
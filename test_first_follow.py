@@ -0,0 +1,12 @@
+import random
+
+from first_follow import compute_first, compute_follow
+from testing import random_grammar
+
+def test_worklist_solver_matches_fixpoint():
+    rng = random.Random(2)
+    for _ in range(500):
+        grammar = random_grammar(rng)
+        first = compute_first(grammar)
+        assert first == compute_first(grammar, solver='fixpoint')
+        assert compute_follow(grammar, first) == compute_follow(grammar, first, solver='fixpoint')
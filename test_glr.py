@@ -0,0 +1,36 @@
+import random
+
+from analysis import GrammarAnalysis
+from glr import count_trees, glr_parse, glr_parse_forest
+from grammar import Grammar
+from testing import earley, random_grammar, strings
+
+def test_glr_matches_earley():
+    rng = random.Random(20)
+    for _ in range(200):
+        grammar = random_grammar(rng)
+        action, goto = GrammarAnalysis(grammar).glr_table
+        for input_string in strings(5):
+            assert glr_parse(action, goto, input_string) == earley(grammar, input_string)
+
+def test_glr_counts_ambiguous_trees():
+    # E -> E+E | i has Catalan-many trees
+    grammar = Grammar.from_lines(["S -> S+S i"])
+    action, goto = GrammarAnalysis(grammar).glr_table
+    for operands, catalan in ((1, 1), (2, 1), (3, 2), (4, 5), (5, 14), (8, 429)):
+        root = glr_parse_forest(action, goto, '+'.join('i' * operands))
+        assert count_trees(root) == catalan
+
+def test_glr_counts_trees_of_long_productions(deadline):
+    # Reductions by S -> SSS walk many stack paths; trees are counted by
+    # splitting the input into two or three parts
+    grammar = Grammar.from_lines(["S -> SSS SS i"])
+    action, goto = GrammarAnalysis(grammar).glr_table
+    trees = [0, 1]
+    for n in range(2, 31):
+        trees.append(sum(trees[k] * trees[n - k] for k in range(1, n)) +
+                     sum(trees[j] * trees[k] * trees[n - j - k]
+                         for j in range(1, n) for k in range(1, n - j)))
+    for n in (1, 2, 3, 5, 10, 30):
+        assert count_trees(glr_parse_forest(action, goto, 'i' * n)) == trees[n]
+    assert not glr_parse(action, goto, 'i' * 30 + 'ii+')
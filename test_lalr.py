@@ -0,0 +1,103 @@
+import random
+
+from analysis import GrammarAnalysis
+from lalr import compute_lalr_lookaheads
+from slr_parser import LR0Automaton, slr_parse, slr_parse_compiled
+from testing import earley, production_symbols, random_grammar, strings
+
+def canonical_lr1_lookaheads(lr0):
+    """LR(1) lookaheads of every completed item, merged by core, from the
+    canonical LR(1) collection of the automaton's augmented grammar."""
+    augmented = lr0.augmented
+    rules = {nt: [production_symbols(p) for p in prods] for nt, prods in augmented.productions.items()}
+    first = {nt: set() for nt in rules}
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for nt, bodies in rules.items():
+            for body in bodies:
+                for symbol in body:
+                    add = first[symbol] if symbol in rules else {symbol}
+                    if not add <= first[nt]:
+                        first[nt] |= add
+                        changed = True
+                    if symbol not in nullable:
+                        break
+                else:
+                    if nt not in nullable:
+                        nullable.add(nt)
+                        changed = True
+
+    def first_of(symbols, lookahead):
+        result = set()
+        for symbol in symbols:
+            result |= first[symbol] if symbol in rules else {symbol}
+            if symbol not in nullable:
+                return result
+        return result | {lookahead}
+
+    def closure(items):
+        items = set(items)
+        work = list(items)
+        while work:
+            nt, body, dot, lookahead = work.pop()
+            if dot < len(body) and body[dot] in rules:
+                for terminal in first_of(body[dot + 1:], lookahead):
+                    for b in rules[body[dot]]:
+                        item = (body[dot], b, 0, terminal)
+                        if item not in items:
+                            items.add(item)
+                            work.append(item)
+        return frozenset(items)
+
+    start = augmented.start_symbol
+    states = [closure({(start, rules[start][0], 0, '$')})]
+    seen = set(states)
+    merged = {}
+    for state in states:
+        core = frozenset((nt, body, dot) for nt, body, dot, _ in state)
+        for nt, body, dot, lookahead in state:
+            if dot == len(body) and nt != start:
+                merged.setdefault((core, (nt, body)), set()).add(lookahead)
+        moves = {}
+        for nt, body, dot, lookahead in state:
+            if dot < len(body):
+                moves.setdefault(body[dot], set()).add((nt, body, dot + 1, lookahead))
+        for kernel in moves.values():
+            target = closure(kernel)
+            if target not in seen:
+                seen.add(target)
+                states.append(target)
+    return merged
+
+def test_lalr_lookaheads_match_merged_lr1():
+    rng = random.Random(9)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        lr0 = LR0Automaton(grammar)
+        expected = canonical_lr1_lookaheads(lr0)
+        lookaheads = compute_lalr_lookaheads(grammar, lr0)
+        for i, state in enumerate(lr0.states):
+            core = frozenset((item.nonterminal, production_symbols(item.production), item.dot_position)
+                             for item in map(lr0.item, state))
+            for item in state:
+                production_id = lr0.item_reduces[item]
+                if production_id is None or production_id == 0:
+                    continue
+                nt, production = lr0.productions[production_id]
+                assert lookaheads.get((i, (nt, production)), set()) == \
+                    expected.get((core, (nt, production_symbols(production))), set())
+
+def test_lalr_parsers_match_earley(deadline):
+    rng = random.Random(9)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        action, goto = analysis.lalr_table
+        if action is None:
+            continue
+        for input_string in strings(5):
+            expected = earley(grammar, input_string)
+            assert slr_parse(grammar, action, goto, input_string) == expected
+            assert slr_parse_compiled(analysis.lalr_compiled, input_string) == expected
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from analysis import GrammarAnalysis
+from lexer import Lexer, LexError
+from ll_parser import ll_parse_ids
+from slr_parser import slr_parse_ids
+from testing import earley, random_grammar, strings
+
+# The terminals a and b of the random grammars as numbers and words
+LEXER = Lexer([('a', r'\d+'), ('b', r'[a-z_]\w*'), ('space', r'\s+')], skip=['space'])
+
+def render(rng, tokens):
+    text = ''
+    for k, token in enumerate(tokens):
+        if token == 'a':
+            lexeme = str(rng.randint(0, 10 ** rng.randint(1, 4)))
+        else:
+            lexeme = rng.choice(['x', 'if', 'a1', 'foo_bar', '_'])
+        # A word right after a number needs no space
+        if k and not (tokens[k - 1] == 'a' and token == 'b' and rng.random() < 0.5):
+            text += rng.choice([' ', '\t', '\n ', '  '])
+        text += lexeme
+    return text
+
+def test_token_ids_parse_like_earley():
+    rng = random.Random(11)
+    for _ in range(200):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        for table, parse_ids in ((analysis.ll_compiled, ll_parse_ids),
+                                 (analysis.slr_compiled, slr_parse_ids)):
+            if table is None:
+                continue
+            for tokens in strings(5):
+                text = render(rng, tokens)
+                assert [name for name, _ in LEXER.tokenize(text)] == list(tokens)
+                assert parse_ids(table, LEXER.token_ids(text, table)) == earley(grammar, tokens)
+                # Text that no token matches is rejected
+                assert not parse_ids(table, LEXER.token_ids(text + ' #', table))
+
+def test_longest_match_then_first_definition():
+    lexer = Lexer([('if', 'if'), ('id', r'[a-z]+'), ('num', r'\d+(\.\d+)?'), ('space', ' ')],
+                  skip=['space'])
+    assert list(lexer.tokenize('if iff 1.5 2')) == [('if', 'if'), ('id', 'iff'),
+                                                    ('num', '1.5'), ('num', '2')]
+    with pytest.raises(LexError) as error:
+        list(lexer.tokenize('if #'))
+    assert error.value.position == 3
@@ -0,0 +1,30 @@
+import random
+
+from analysis import GrammarAnalysis
+from ll_parser import LLStreamParser, ll_parse_errors
+from testing import earley, random_chunks, random_grammar, strings
+
+def test_stream_parser_matches_earley():
+    rng = random.Random(6)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        table = GrammarAnalysis(grammar).ll_table
+        if table is None:
+            continue
+        for input_string in strings(5):
+            chunks = (iter(chunk) for chunk in random_chunks(rng, input_string))
+            assert LLStreamParser(grammar, table).parse_chunks(chunks) == earley(grammar, input_string)
+
+def test_errors_match_earley():
+    rng = random.Random(15)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        if analysis.ll_table is None:
+            continue
+        for input_string in strings(5, 'abx'):
+            errors = ll_parse_errors(grammar, analysis.ll_table, analysis.follow, input_string)
+            assert (not errors) == earley(grammar, input_string)
+            positions = [error.position for error in errors]
+            assert positions == sorted(set(positions))
+            assert all(position <= len(input_string) for position in positions)
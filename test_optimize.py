@@ -0,0 +1,46 @@
+import random
+
+from optimize import left_recursive, optimize, remove_useless
+from testing import earley, production_symbols, random_grammar, strings
+
+def test_optimize_preserves_language_and_removes_left_recursion():
+    rng = random.Random(19)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        result = optimize(grammar)
+        assert not left_recursive(result.grammar)
+        for input_string in strings(4):
+            assert earley(result.grammar, input_string) == earley(grammar, input_string)
+        for sources in result.origins.values():
+            assert all(source in grammar.productions[source_nt] for source_nt, source in sources)
+
+def test_remove_useless_matches_fixpoint():
+    rng = random.Random(19)
+    for _ in range(500):
+        grammar = random_grammar(rng)
+        bodies = [(nt, p, production_symbols(p)) for nt, prods in grammar.productions.items()
+                  for p in prods]
+        productive = set()
+        changed = True
+        while changed:
+            changed = False
+            for nt, _, body in bodies:
+                if nt not in productive and all(s in productive or s.islower() for s in body):
+                    productive.add(nt)
+                    changed = True
+        bodies = [(nt, p, body) for nt, p, body in bodies
+                  if all(s in productive or s.islower() for s in body)]
+        reachable = {grammar.start_symbol}
+        changed = True
+        while changed:
+            changed = False
+            for nt, _, body in bodies:
+                if nt in reachable and not set(body) - set('ab') <= reachable:
+                    reachable |= set(body) - set('ab')
+                    changed = True
+
+        result = remove_useless(grammar)
+        assert {(nt, p) for nt, prods in result.productions.items() for p in prods} == \
+            {(nt, p) for nt, p, _ in bodies if nt in reachable}
+        for input_string in strings(4):
+            assert earley(result, input_string) == earley(grammar, input_string)
@@ -0,0 +1,69 @@
+import random
+
+from analysis import GrammarAnalysis
+from grammar import Grammar
+from ll_parser import ll_parse, ll_parse_compiled
+from parse_tree import Callbacks, Node, PostfixBuilder, TreeBuilder
+from slr_parser import slr_parse, slr_parse_compiled
+from testing import earley, production_symbols, random_grammar, strings
+
+def leaves(grammar, node):
+    # The terminals under node, checking that every node is an alternative
+    # of its nonterminal with children to match
+    if not isinstance(node, Node):
+        return [node]
+    assert node.production in grammar.productions[node.symbol] or \
+        node.production == () and 'e' in grammar.productions[node.symbol]
+    assert tuple(child.symbol if isinstance(child, Node) else child
+                 for child in node.children) == production_symbols(node.production)
+    return [leaf for child in node.children for leaf in leaves(grammar, child)]
+
+def test_trees_derive_the_input(deadline):
+    rng = random.Random(12)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        drivers = []
+        if analysis.is_ll1:
+            drivers += [lambda s, semantics: ll_parse(grammar, analysis.ll_table, s + '$', semantics),
+                        lambda s, semantics: ll_parse_compiled(analysis.ll_compiled, s, semantics)]
+        if analysis.is_slr1:
+            action, goto = analysis.slr_table
+            drivers += [lambda s, semantics: slr_parse(grammar, action, goto, s, semantics),
+                        lambda s, semantics: slr_parse_compiled(analysis.slr_compiled, s, semantics)]
+        for input_string in strings(5):
+            expected = earley(grammar, input_string)
+            trees = set()
+            for parse in drivers:
+                builder = TreeBuilder()
+                postfix = PostfixBuilder()
+                assert parse(input_string, builder) == expected
+                assert parse(input_string, postfix) == expected
+                if expected:
+                    assert builder.root.symbol == grammar.start_symbol
+                    assert ''.join(leaves(grammar, builder.root)) == input_string
+                    assert str(postfix.to_tree()) == str(builder.root)
+                    trees.add(str(builder.root))
+            # LL(1) and SLR(1) grammars are unambiguous, so every driver
+            # builds the same tree
+            assert len(trees) <= 1
+
+def test_callbacks_evaluate_in_postfix_order():
+    grammar = Grammar.from_lines(["S -> S+T T", "T -> T*F F", "F -> (S) 1 2 3"])
+    analysis = GrammarAnalysis(grammar)
+    action, goto = analysis.slr_table
+
+    def evaluate(nonterminal, production, values):
+        if len(values) == 1:
+            return int(values[0]) if isinstance(values[0], str) else values[0]
+        if production == '(S)':
+            return values[1]
+        return values[0] + values[2] if production == 'S+T' else values[0] * values[2]
+
+    for input_string, value in (('2+3*2', 8), ('(2+3)*2', 10), ('1', 1), ('3*(1+1)*3', 18)):
+        for parse in (lambda semantics: slr_parse(grammar, action, goto, input_string, semantics),
+                      lambda semantics: slr_parse_compiled(analysis.slr_compiled, input_string,
+                                                           semantics)):
+            callbacks = Callbacks(evaluate)
+            assert parse(callbacks)
+            assert callbacks.result == value
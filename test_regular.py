@@ -0,0 +1,57 @@
+import random
+
+from analysis import GrammarAnalysis
+from grammar import Grammar
+from regular import NUMPY_THRESHOLD, regular_dfa
+from testing import NONTERMINALS, TERMINALS, earley, random_grammar, strings
+
+def linear_grammar(rng, left):
+    # Every production is a terminal string with at most one nonterminal,
+    # at the end (right-linear) or the start (left-linear)
+    grammar = Grammar()
+    for nt in NONTERMINALS:
+        alternatives = []
+        for _ in range(rng.randint(1, 3)):
+            terminals = ''.join(rng.choice(TERMINALS) for _ in range(rng.randint(0, 2)))
+            nonterminal = rng.choice(NONTERMINALS) if rng.random() < 0.6 else ''
+            alternatives.append((nonterminal + terminals if left else terminals + nonterminal) or 'e')
+        grammar.add_production(nt, alternatives)
+    return grammar
+
+def test_dfa_matches_earley():
+    rng = random.Random(21)
+    recognized = 0
+    for k in range(300):
+        # Right-linear, left-linear, and any grammar that happens to be
+        # recognized as regular
+        if k % 3 < 2:
+            grammar = linear_grammar(rng, left=k % 3 == 1)
+            dfa = regular_dfa(grammar)
+            assert dfa is not None
+        else:
+            grammar = random_grammar(rng)
+            dfa = regular_dfa(grammar)
+        if dfa is None:
+            continue
+        recognized += 1
+        inputs = list(strings(5, 'abx'))
+        expected = [earley(grammar, input_string) for input_string in inputs]
+        assert [dfa.accepts(input_string) for input_string in inputs] == expected
+        # Enough strings for the NumPy path, when NumPy is installed
+        copies = NUMPY_THRESHOLD // len(inputs) + 1
+        assert dfa.accepts_many(inputs * copies) == expected * copies
+    assert recognized > 200
+
+def test_analysis_dfa_is_none_for_self_embedding():
+    assert GrammarAnalysis(Grammar.from_lines(["S -> aSb e"])).dfa is None
+    assert GrammarAnalysis(Grammar.from_lines(["S -> aS e"])).dfa is not None
+
+def test_regular_dfa_of_long_chain():
+    grammar = Grammar()
+    grammar.start_symbol = 'N0'
+    for k in range(800):
+        grammar.add_production(f'N{k}', [('a', f'N{k + 1}')])
+    grammar.add_production('N800', [('a',)])
+    dfa = regular_dfa(grammar)
+    assert dfa.accepts('a' * 801)
+    assert not dfa.accepts('a' * 800)
@@ -0,0 +1,60 @@
+import asyncio
+import random
+
+from analysis import GrammarAnalysis
+from server import GrammarRegistry, ParseServer
+from testing import earley, random_grammar, strings
+
+def serve(server, path, requests):
+    """Send the request lines to ``server`` over a Unix socket at once and
+    return the answer lines."""
+    async def run():
+        listener = await asyncio.start_unix_server(server.handle, path=str(path))
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(path))
+            writer.write(("\n".join(requests + ["QUIT"]) + "\n").encode())
+            await writer.drain()
+            answer = await asyncio.wait_for(reader.read(), 60)
+            writer.close()
+            return answer.decode().splitlines()
+        finally:
+            listener.close()
+            server.close()
+    return asyncio.run(run())
+
+def grammar_lines(grammar):
+    return [f"{nt} -> {' '.join(productions)}" for nt, productions in grammar.productions.items()]
+
+def test_protocol_matches_earley(tmp_path):
+    rng = random.Random(16)
+    inputs = list(strings(4))
+    requests = []
+    expected = []
+    for k in range(40):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        supported = [name for name, ok in (('ll', analysis.is_ll1), ('slr', analysis.is_slr1)) if ok]
+        if 'slr' in supported or not supported and analysis.is_lalr1:
+            supported.append('lalr')
+        lines = grammar_lines(grammar)
+        # Requests for the grammar follow right away, without waiting for
+        # its analysis
+        requests += [f"GRAMMAR g{k} {len(lines)}"] + lines
+        expected.append("OK " + (" ".join(supported) or "none"))
+        results = ["yes" if earley(grammar, s) else "no" for s in inputs]
+        if supported:
+            requests += [f"PARSE g{k} {s}" for s in inputs[1:]]
+            expected += results[1:]
+            requests += [f"BATCH g{k} {len(inputs)}"] + inputs
+            expected += [f"OK {len(inputs)}"] + results
+        else:
+            requests.append(f"PARSE g{k} a")
+            expected.append("ERR grammar is neither LL(1) nor SLR(1)")
+        requests.append(f"DROP g{k}")
+        expected.append("OK")
+    requests += ["PARSE g0 a", "FROB", "GRAMMAR q 1 ll", "S -> Sa b"]
+    expected += ["ERR unknown grammar g0", "ERR unknown command FROB", "ERR grammar is not LL(1)"]
+
+    # Batches of 8 strings or more go to two worker processes
+    server = ParseServer(GrammarRegistry(), workers=2, pool_threshold=8, chunksize=4)
+    assert serve(server, tmp_path / 'server.sock', requests) == expected
@@ -0,0 +1,62 @@
+import random
+
+from analysis import GrammarAnalysis
+from grammar import Grammar
+from slr_parser import SLRStreamParser, slr_parse, slr_parse_errors
+from testing import earley, random_chunks, random_grammar, strings
+
+def test_slr_parse_matches_earley(deadline):
+    rng = random.Random(1)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        action, goto = GrammarAnalysis(grammar).slr_table
+        if action is None:
+            continue
+        for input_string in strings(5):
+            assert slr_parse(grammar, action, goto, input_string) == earley(grammar, input_string)
+
+def test_stream_parser_matches_earley(deadline):
+    rng = random.Random(6)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        action, goto = GrammarAnalysis(grammar).slr_table
+        if action is None:
+            continue
+        for input_string in strings(5):
+            chunks = (iter(chunk) for chunk in random_chunks(rng, input_string))
+            assert SLRStreamParser(action, goto).parse_chunks(chunks) == earley(grammar, input_string)
+
+def test_empty_reductions_terminate(deadline):
+    # Useless productions once made these parses loop without reading input
+    for lines, start, input_string in ((["S -> BSb", "A -> bBb aBB", "B -> e"], 'B', 'b'),
+                                       (["S -> AB bb", "A -> BAb", "B -> e"], 'S', ''),
+                                       (["S -> e bCA", "A -> SB", "B -> Cb", "C -> SC"], 'S', 'b')):
+        grammar = Grammar.from_lines(lines)
+        grammar.start_symbol = start
+        action, goto = GrammarAnalysis(grammar).slr_table
+        assert not slr_parse(grammar, action, goto, input_string)
+        assert slr_parse_errors(grammar, action, goto, input_string)
+
+def test_errors_match_earley(deadline):
+    # 'x' is in no grammar, so some inputs have symbols to delete
+    rng = random.Random(15)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        for action, goto in (analysis.slr_table, analysis.lalr_table):
+            if action is None:
+                continue
+            for input_string in strings(5, 'abx'):
+                errors = slr_parse_errors(grammar, action, goto, input_string)
+                assert (not errors) == earley(grammar, input_string)
+                positions = [error.position for error in errors]
+                assert positions == sorted(set(positions))
+                assert all(position <= len(input_string) for position in positions)
+
+def test_one_error_per_stray_symbol():
+    grammar = Grammar.from_lines(["S -> S+T T", "T -> T*F F", "F -> (S) i"])
+    action, goto = GrammarAnalysis(grammar).slr_table
+    for input_string, positions in (('i+i)*i', [3]), ('i+)i', [2]), ('ii', [1]), ('i+*i', [2]),
+                                    ('(i+i', [4]), ('i++i', [2])):
+        errors = slr_parse_errors(grammar, action, goto, input_string)
+        assert [error.position for error in errors] == positions
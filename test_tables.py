@@ -0,0 +1,23 @@
+import random
+
+from analysis import GrammarAnalysis
+from ll_parser import ll_parse, ll_parse_compiled, ll_parse_ids
+from slr_parser import slr_parse_compiled, slr_parse_ids
+from testing import earley, random_grammar, strings
+
+def test_compiled_tables_match_earley(deadline):
+    # 'x' is not a terminal of any grammar and goes to the unknown column
+    rng = random.Random(4)
+    for _ in range(300):
+        grammar = random_grammar(rng)
+        analysis = GrammarAnalysis(grammar)
+        for table, parse, parse_ids in ((analysis.ll_compiled, ll_parse_compiled, ll_parse_ids),
+                                        (analysis.slr_compiled, slr_parse_compiled, slr_parse_ids)):
+            if table is None:
+                continue
+            for input_string in strings(5, 'abx'):
+                expected = earley(grammar, input_string)
+                assert parse(table, input_string) == expected
+                assert parse_ids(table, iter(table.encode(input_string))) == expected
+                if parse is ll_parse_compiled:
+                    assert ll_parse(grammar, analysis.ll_table, input_string + '$') == expected
@@ -0,0 +1,79 @@
+"""Helpers shared by the randomized tests.
+
+Grammars are small random ones over the nonterminals S, A, B and the
+terminals a, b, and every check compares against Earley's algorithm, which
+handles any grammar; each test seeds its own generator, so a failure
+reproduces.
+"""
+import itertools
+
+from grammar import Grammar
+
+NONTERMINALS = 'SAB'
+TERMINALS = 'ab'
+
+def random_grammar(rng, nonterminals=NONTERMINALS, terminals=TERMINALS):
+    grammar = Grammar()
+    symbols = nonterminals + terminals
+    for nt in nonterminals:
+        alternatives = [''.join(rng.choice(symbols) for _ in range(rng.randint(0, 3))) or 'e'
+                        for _ in range(rng.randint(1, 3))]
+        grammar.add_production(nt, alternatives)
+    return grammar
+
+def strings(max_length, terminals=TERMINALS):
+    for n in range(max_length + 1):
+        for symbols in itertools.product(terminals, repeat=n):
+            yield ''.join(symbols)
+
+def random_chunks(rng, input_string):
+    """Split the input at random points, as a stream would deliver it."""
+    chunks = []
+    i = 0
+    while i < len(input_string):
+        j = rng.randint(i + 1, len(input_string))
+        chunks.append(input_string[i:j])
+        i = j
+    return chunks
+
+def production_symbols(production):
+    """The symbols of a production, () for 'e'."""
+    return () if production == 'e' else tuple(production)
+
+def earley(grammar, input_string):
+    """Whether the grammar derives the input, by Earley's algorithm."""
+    rules = {nt: [production_symbols(p) for p in prods] for nt, prods in grammar.productions.items()}
+    nullable = set()
+    changed = True
+    while changed:
+        changed = False
+        for nt, bodies in rules.items():
+            if nt not in nullable and any(all(s in nullable for s in body) for body in bodies):
+                nullable.add(nt)
+                changed = True
+
+    start = grammar.start_symbol
+    chart = [set() for _ in range(len(input_string) + 1)]
+    chart[0] = {(start, body, 0, 0) for body in rules.get(start, ())}
+    for i in range(len(input_string) + 1):
+        work = list(chart[i])
+        while work:
+            nt, body, dot, origin = work.pop()
+            new = []
+            if dot < len(body) and body[dot] in rules:
+                symbol = body[dot]
+                new += [(symbol, b, 0, i) for b in rules[symbol]]
+                if symbol in nullable:
+                    new.append((nt, body, dot + 1, origin))
+            elif dot == len(body):
+                new += [(n, b, d + 1, o) for n, b, d, o in chart[origin]
+                        if d < len(b) and b[d] == nt]
+            for item in new:
+                if item not in chart[i]:
+                    chart[i].add(item)
+                    work.append(item)
+        if i < len(input_string):
+            chart[i + 1] = {(nt, body, dot + 1, origin) for nt, body, dot, origin in chart[i]
+                            if dot < len(body) and body[dot] == input_string[i]}
+    return any(nt == start and dot == len(body) and origin == 0
+               for nt, body, dot, origin in chart[-1])